@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StockPrice, Prediction
+from .models import StockPrice, Prediction, ReportJob, Symbol, SymbolWatermark
 @admin.register(StockPrice)
 class StockPriceAdmin(admin.ModelAdmin):
     list_display = ('symbol', 'date', 'open_price', 'low_price', 'close_price', 'volume')
@@ -7,4 +7,18 @@ class StockPriceAdmin(admin.ModelAdmin):
 @admin.register(Prediction)
 class PredictionAdmin(admin.ModelAdmin):
     list_display = ('symbol', 'date', 'predicted_price', 'created_at')
-    search_fields = ('symbol', 'date')
\ No newline at end of file
+    search_fields = ('symbol', 'date')
+@admin.register(SymbolWatermark)
+class SymbolWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('symbol', 'latest_date', 'last_fetched_at')
+    search_fields = ('symbol',)
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'symbol', 'status', 'progress', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('symbol',)
+@admin.register(Symbol)
+class SymbolAdmin(admin.ModelAdmin):
+    list_display = ('symbol', 'name', 'exchange', 'asset_type', 'ipo_date')
+    list_filter = ('exchange', 'asset_type')
+    search_fields = ('symbol', 'name')
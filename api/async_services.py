@@ -0,0 +1,125 @@
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .fetcher import get_upstream_bucket, is_retryable, retry_delay
+from .metrics import upstream_coalesced, upstream_duration, upstream_requests
+from .models import Prediction, SymbolWatermark
+from .prediction_cache import cache_predictions
+from .services import (
+    PREDICTION_UPSERT, check_daily_response, check_prediction_windows, daily_series_fetches, daily_series_params, group_prediction_windows,
+    plan_fetch, prediction_rows, prediction_window_rows, predict_windows, store_stock_data,
+)
+import asyncio
+import contextvars
+import functools
+import httpx
+import threading
+import weakref
+
+# Async counterparts of the prediction path in api.services for the ASGI
+# views. Upstream calls go through one pooled httpx client per event loop,
+# reads use the async ORM, and model loading and inference, which hold the
+# GIL for most of their run, are handed to a small bounded thread pool so the
+# event loop keeps serving other requests meanwhile.
+
+_clients = weakref.WeakKeyDictionary()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_async_client():
+    # An httpx client is tied to the loop it was first used on.
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(max_connections=settings.ASYNC_UPSTREAM_MAX_CONNECTIONS, max_keepalive_connections=settings.ASYNC_UPSTREAM_MAX_CONNECTIONS)
+        client = _clients[loop] = httpx.AsyncClient(limits=limits, timeout=settings.UPSTREAM_TIMEOUT)
+    return client
+
+
+def get_inference_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.INFERENCE_MAX_WORKERS, thread_name_prefix='inference')
+    return _executor
+
+
+async def run_inference(function, *args):
+    # The context is copied so metrics recorded in the pool still end up in
+    # the request's Server-Timing header.
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(get_inference_executor(), functools.partial(context.run, function, *args))
+
+
+async def upstream_aget(params):
+    with upstream_duration.time('upstream', function=params['function']):
+        try:
+            response = await get_async_client().get(settings.ALPHA_VANTAGE_API_URL, params=params)
+        except httpx.HTTPError:
+            upstream_requests.inc(function=params['function'], status='error')
+            raise
+    upstream_requests.inc(function=params['function'], status=response.status_code)
+    return response
+
+
+async def arequest_daily_series(symbol, outputsize='compact'):
+    # Shares in-flight fetches with request_daily_series, whichever of the
+    # two started the one for this symbol.
+    data, outcome = await daily_series_fetches.ado((symbol, outputsize), lambda: _arequest_daily_series(symbol, outputsize))
+    if outcome != 'called':
+        upstream_coalesced.inc(function='TIME_SERIES_DAILY', outcome=outcome)
+    return data
+
+
+async def _arequest_daily_series(symbol, outputsize, max_retries=None, backoff=1.0):
+    # fetch_with_retry for the event loop, drawing on the same per-process
+    # rate limit as the bulk fetcher.
+    max_retries = settings.FETCH_MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        attempt += 1
+        await get_upstream_bucket().aacquire()
+        try:
+            response = await upstream_aget(daily_series_params(symbol, outputsize))
+            return check_daily_response(symbol, response)
+        except Exception as e:
+            if not is_retryable(e) or attempt > max_retries:
+                e.attempts = attempt
+                raise
+            await asyncio.sleep(retry_delay(attempt, backoff))
+
+
+async def arefresh_stock_data(symbol):
+    watermark = await SymbolWatermark.objects.filter(symbol=symbol).afirst()
+    outputsize = plan_fetch(watermark)
+    if outputsize is not None:
+        data = await arequest_daily_series(symbol, outputsize)
+        # The upsert runs in a transaction, which the async ORM cannot open.
+        await sync_to_async(store_stock_data)(symbol, data, since=watermark.latest_date if watermark else None)
+
+
+async def apredict_batch(symbols):
+    symbols = list(dict.fromkeys(symbols))
+    windows = group_prediction_windows([row async for row in prediction_window_rows(symbols)])
+    ready, errors = check_prediction_windows(symbols, windows)
+    if not ready:
+        return {}, errors
+
+    predictions, fresh, keys = await run_inference(predict_windows, windows, ready)
+    if fresh:
+        await Prediction.objects.abulk_create(prediction_rows(fresh), **PREDICTION_UPSERT)
+        await sync_to_async(cache_predictions)(keys, fresh)
+        predictions.update(fresh)
+
+    return {symbol: predictions[symbol] for symbol in ready}, errors
+
+
+async def apredict_stock(symbol):
+    await arefresh_stock_data(symbol)
+
+    predictions, errors = await apredict_batch([symbol])
+    if symbol in errors:
+        raise ValueError(errors[symbol])
+    return predictions[symbol]
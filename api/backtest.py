@@ -1,50 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.conf import settings
+from .backtest_engine import backtest_series, max_drawdown, moving_average, simulate_crossover
+from .metrics import backtest_duration
 from .models import StockPrice
-import pandas as pd
+from .price_archive import load_archive, merge_series
+from .price_cache import get_price_series
+import numpy as np
 
-def run_backtest(symbol, initial_investment, short_ma, long_ma):
-    queryset = StockPrice.objects.filter(symbol=symbol).order_by('date')
-    if not queryset.exists():
+
+def load_close_prices(symbol):
+    prices = get_price_series(symbol).close
+    if prices.size == 0:
         raise ValueError(f"No data found for symbol {symbol}")
+    return prices
+
+
+def load_close_series(symbols):
+    rows = StockPrice.objects.filter(symbol__in=symbols).order_by('symbol', 'date').values_list('symbol', 'date', 'close_price')
+
+    grouped = {}
+    for symbol, date, close in rows:
+        dates, closes = grouped.setdefault(symbol, ([], []))
+        dates.append(date)
+        closes.append(close)
+
+    series = {}
+    for symbol in symbols:
+        dates, closes = grouped.get(symbol, ([], []))
+        hot = (np.array(dates, dtype='datetime64[D]'), np.array(closes, dtype=np.float64))
+        archived = load_archive(symbol)
+        if archived is not None:
+            hot = merge_series((archived[0], archived[4]), hot)
+        if hot[0].size:
+            series[symbol] = hot
+    return series
+
+
+@backtest_duration.time('backtest', kind='single')
+def run_backtest(symbol, initial_investment, short_ma, long_ma):
+    prices = load_close_prices(symbol)
+    if prices.size < max(short_ma, long_ma):
+        raise ValueError(f"Not enough data for symbol {symbol} to compute a {max(short_ma, long_ma)}-day moving average")
+
+    return simulate_crossover(prices, moving_average(prices, short_ma), moving_average(prices, long_ma), initial_investment)
+
+
+@backtest_duration.time('backtest', kind='grid')
+def run_backtest_grid(symbol, initial_investment, short_ma_values, long_ma_values):
+    prices = load_close_prices(symbol)
+    pairs = [(short_ma, long_ma) for short_ma in short_ma_values for long_ma in long_ma_values
+             if short_ma < long_ma <= prices.size]
+    if not pairs:
+        raise ValueError(f"Not enough data for symbol {symbol} to evaluate any of the requested moving average pairs")
+
+    # Each window length is averaged once and shared by every pair using it.
+    averages = {window: moving_average(prices, window) for pair in pairs for window in pair}
+
+    results = []
+    for short_ma, long_ma in pairs:
+        summary = simulate_crossover(prices, averages[short_ma], averages[long_ma], initial_investment)
+        results.append({"short_ma": short_ma, "long_ma": long_ma, **summary})
+
+    results.sort(key=lambda result: (-result["total_return"], result["max_drawdown"]))
+    return results
+
+
+@backtest_duration.time('backtest', kind='portfolio')
+def run_portfolio_backtest(symbols, initial_investment, short_ma, long_ma, max_workers=None):
+    symbols = list(dict.fromkeys(symbols))
+    max_workers = max_workers or settings.BACKTEST_MAX_WORKERS
+
+    series = load_close_series(symbols)
+    failures = {symbol: f"No data found for symbol {symbol}" for symbol in symbols if symbol not in series}
+    if not series:
+        raise ValueError("No data found for any of the requested symbols")
+    window = max(short_ma, long_ma)
+    for symbol in [symbol for symbol, (_, prices) in series.items() if prices.size < window]:
+        failures[symbol] = f"Not enough data for symbol {symbol} to compute a {window}-day moving average"
+        del series[symbol]
+    if not series:
+        return {"portfolio": None, "results": {}, "failures": failures}
+
+    # Capital is split evenly across the symbols that can be backtested.
+    allocation = initial_investment / len(series)
+    jobs = [(symbol, dates, prices, allocation, short_ma, long_ma) for symbol, (dates, prices) in series.items()]
+
+    completed = []
+    if max_workers == 1 or len(jobs) == 1:
+        for job in jobs:
+            try:
+                completed.append(backtest_series(*job))
+            except Exception as e:
+                failures[job[0]] = str(e)
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            futures = {executor.submit(backtest_series, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    completed.append(future.result())
+                except Exception as e:
+                    failures[futures[future]] = str(e)
+
+    if not completed:
+        return {"portfolio": None, "results": {}, "failures": failures}
+
+    # Align every equity curve on the union of trading dates. A symbol is
+    # held at its last known value on days it has no bar, and at its
+    # untouched allocation before its first bar. The allocation of a symbol
+    # whose backtest failed is held as cash.
+    calendar = np.unique(np.concatenate([dates for _, _, dates, _ in completed]))
+    portfolio_equity = np.full(calendar.size, allocation * (len(jobs) - len(completed)))
+    for _, _, dates, equity in completed:
+        index = np.searchsorted(dates, calendar, side='right') - 1
+        portfolio_equity += np.where(index >= 0, equity[np.maximum(index, 0)], allocation)
 
-    data = pd.DataFrame.from_records(queryset.values())
-    data.set_index('date', inplace=True)
-    data.sort_index(inplace=True)
-
-    data['short_ma'] = data['close_price'].rolling(window=short_ma).mean()
-    data['long_ma'] = data['close_price'].rolling(window=long_ma).mean()
-
-    position = 0
-    cash = initial_investment
-    investment_value = 0
-    trades = 0
-    max_drawdown = 0
-    peak = 0
-
-    for i in range(len(data)):
-        if pd.isna(data['short_ma'].iloc[i]) or pd.isna(data['long_ma'].iloc[i]):
-            continue
-
-        if position == 0 and data['short_ma'].iloc[i] > data['long_ma'].iloc[i]:
-            position = cash / data['close_price'].iloc[i]
-            cash = 0
-            trades += 1
-
-        elif position > 0 and data['short_ma'].iloc[i] < data['long_ma'].iloc[i]:
-            cash = position * data['close_price'].iloc[i]
-            position = 0
-            trades += 1
-
-        investment_value = position * data['close_price'].iloc[i] if position > 0 else cash
-        peak = max(peak, investment_value)
-        max_drawdown = max(max_drawdown, (peak - investment_value) / peak if peak > 0 else 0)
-
-    if position > 0:
-        cash = position * data['close_price'].iloc[-1]
-    total_return = (cash - initial_investment) / initial_investment * 100
-
-    performance_summary = {
-        "total_return": total_return,
-        "max_drawdown": max_drawdown * 100,
-        "trades_executed": trades
+    invested = allocation * len(completed)
+    return {
+        "portfolio": {
+            "total_return": (float(portfolio_equity[-1]) - initial_investment) / initial_investment * 100,
+            "max_drawdown": max_drawdown(portfolio_equity) * 100,
+            "invested": invested,
+            "cash": initial_investment - invested,
+            "symbols": len(completed)
+        },
+        "results": {symbol: summary for symbol, summary, _, _ in sorted(completed, key=lambda result: result[0])},
+        "failures": failures
     }
-    return performance_summary
\ No newline at end of file
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Pure NumPy strategy simulation. Nothing in here touches Django, so these
+# functions can be shipped to worker processes along with plain arrays.
+
+
+def moving_average(prices, window):
+    return pd.Series(prices).rolling(window=window).mean().to_numpy()
+
+
+def crossover_positions(short_values, long_values):
+    # 1 while long, 0 while flat. A bar where the averages are equal (or not
+    # yet defined) keeps whatever position the previous bar had.
+    signal = np.full(short_values.shape, -1, dtype=np.int8)
+    signal[short_values > long_values] = 1
+    signal[short_values < long_values] = 0
+
+    decided = np.where(signal >= 0, np.arange(signal.size), -1)
+    decided = np.maximum.accumulate(decided)
+    return np.where(decided >= 0, signal[np.maximum(decided, 0)], 0).astype(np.int8)
+
+
+def crossover_equity(prices, short_values, long_values, initial_investment):
+    positions = crossover_positions(short_values, long_values)
+
+    changes = np.diff(positions, prepend=np.int8(0))
+    entries = np.flatnonzero(changes == 1)
+    exits = np.flatnonzero(changes == -1)
+
+    # Only the round trips are walked in Python; every bar in between is
+    # filled with array slices, so cost grows with trades rather than bars.
+    cash = initial_investment
+    equity = np.full(prices.size, float(initial_investment))
+    for k, entry in enumerate(entries):
+        position = cash / prices[entry]
+        if k < exits.size:
+            exit_ = exits[k]
+            equity[entry:exit_] = position * prices[entry:exit_]
+            cash = position * prices[exit_]
+            next_entry = entries[k + 1] if k + 1 < entries.size else prices.size
+            equity[exit_:next_entry] = cash
+        else:
+            equity[entry:] = position * prices[entry:]
+
+    return equity, int(entries.size + exits.size)
+
+
+def max_drawdown(equity):
+    if equity.size == 0:
+        return 0
+    peak = np.maximum.accumulate(np.maximum(equity, 0))
+    drawdown = np.divide(peak - equity, peak, out=np.zeros_like(equity), where=peak > 0)
+    return max(0, float(drawdown.max()))
+
+
+def summarize_equity(equity, valid, trades, initial_investment):
+    # The last bar is marked to market, which is the same as selling any open
+    # position at the final close.
+    final_value = float(equity[-1])
+    total_return = (final_value - initial_investment) / initial_investment * 100
+
+    return {
+        "total_return": total_return,
+        "max_drawdown": max_drawdown(equity[valid]) * 100,
+        "number_of_trades": trades
+    }
+
+
+def simulate_crossover(prices, short_values, long_values, initial_investment):
+    valid = ~(np.isnan(short_values) | np.isnan(long_values))
+    equity, trades = crossover_equity(prices, short_values, long_values, initial_investment)
+    return summarize_equity(equity, valid, trades, initial_investment)
+
+
+def backtest_series(symbol, dates, prices, initial_investment, short_ma, long_ma):
+    if prices.size < long_ma:
+        raise ValueError(f"Not enough data for symbol {symbol} to compute a {long_ma}-day moving average")
+
+    short_values = moving_average(prices, short_ma)
+    long_values = moving_average(prices, long_ma)
+    valid = ~(np.isnan(short_values) | np.isnan(long_values))
+    equity, trades = crossover_equity(prices, short_values, long_values, initial_investment)
+    return symbol, summarize_equity(equity, valid, trades, initial_investment), dates, equity
@@ -0,0 +1,241 @@
+from contextlib import redirect_stdout
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection, transaction
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from unittest import mock
+from .backtest import run_backtest, run_portfolio_backtest
+from .models import SymbolWatermark
+from .price_cache import price_cache
+from .services import predict_batch, predict_stock, store_stock_data
+from .views import GenerateReportView
+import django
+import numpy as np
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+# Benchmarks for the ingestion, backtest, prediction and report hot paths on
+# synthetic data. Everything runs inside one transaction that is rolled back
+# at the end, and the upstream API is replaced by payloads generated here, so
+# a run leaves no trace and needs no network.
+
+SCALES = {
+    'tiny': (1, 1),
+    'small': (10, 5),
+    'medium': (100, 10),
+    'large': (1000, 20),
+    'full': (5000, 20),
+}
+
+TRADING_DAYS_PER_YEAR = 252
+SYMBOL_PREFIX = 'BN'
+
+
+def symbol_name(index):
+    return f'{SYMBOL_PREFIX}{index:05d}'
+
+
+def synthetic_ohlcv(index, years, seed=0, end=None):
+    # Geometric random walk over business days ending at `end` (yesterday by
+    # default). Each symbol has its own seeded generator, so any symbol can be
+    # regenerated on its own without holding the whole universe in memory.
+    # Returns (symbol, dates, open, high, low, close, volume).
+    rng = np.random.default_rng((seed, index))
+    end = np.datetime64(end or timezone.localdate() - timedelta(days=1), 'D')
+    days = years * TRADING_DAYS_PER_YEAR
+    dates = np.busday_offset(end, -np.arange(days)[::-1], roll='backward')
+
+    returns = rng.normal(0.0003, 0.015, days)
+    close = 20 + 180 * rng.random() * np.exp(np.cumsum(returns))
+    open_ = close * np.exp(rng.normal(0, 0.005, days))
+    high = np.maximum(open_, close) * (1 + rng.random(days) * 0.01)
+    low = np.minimum(open_, close) * (1 - rng.random(days) * 0.01)
+    volume = rng.integers(100000, 10000000, days)
+    return symbol_name(index), dates, open_, high, low, close, volume
+
+
+def daily_payload(dates, open_, high, low, close, volume):
+    # The 'Time Series (Daily)' part of an Alpha Vantage response.
+    return {
+        str(day): {
+            '1. open': f'{o:.4f}',
+            '2. high': f'{h:.4f}',
+            '3. low': f'{l:.4f}',
+            '4. close': f'{c:.4f}',
+            '5. volume': str(v),
+        }
+        for day, o, h, l, c, v in zip(dates, open_, high, low, close, volume)
+    }
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self.text = ''
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeUpstream:
+    # Stands in for the pooled requests session in api.services and answers
+    # TIME_SERIES_DAILY with payloads from `provider(symbol)`.
+    def __init__(self, provider):
+        self.provider = provider
+        self.requests = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.requests += 1
+        series = self.provider(params['symbol'])
+        if params.get('outputsize') != 'full':
+            series = dict(sorted(series.items())[-100:])
+        return FakeResponse({'Time Series (Daily)': series})
+
+
+def summarize(timings, items):
+    return {'min': min(timings), 'median': statistics.median(timings), 'runs': len(timings), 'items': items}
+
+
+def timed(function, repeat, items):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, items)
+
+
+def is_test_database():
+    # Django names test databases test_<NAME> unless TEST['NAME'] says
+    # otherwise, and an in-memory SQLite database dies with the process.
+    settings_dict = connection.settings_dict
+    name = str(settings_dict['NAME'])
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        return True
+    return name == settings_dict['TEST'].get('NAME') or os.path.basename(name).startswith('test_')
+
+
+class _Rollback(Exception):
+    pass
+
+
+def run_suite(scale='small', repeat=3, sample=20, seed=0, log=None):
+    symbol_count, years = SCALES[scale]
+    log = log or (lambda message: None)
+    results = {}
+
+    # A private cache, so clearing it between runs leaves the application's
+    # entries alone.
+    caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks'}}
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull), tempfile.TemporaryDirectory() as scratch, \
+            override_settings(CACHES=caches, REPORT_CACHE_DIR=os.path.join(scratch, 'reports'), PRICE_ARCHIVE_DIR=os.path.join(scratch, 'archive'), UPSTREAM_COALESCE_TTL=0):
+        try:
+            with transaction.atomic():
+                symbols = [symbol_name(index) for index in range(symbol_count)]
+                sampled = symbols[:sample]
+
+                def payload(index):
+                    return daily_payload(*synthetic_ohlcv(index, years, seed)[1:])
+
+                def ingest():
+                    # Payloads are generated outside the timed part. Every run
+                    # after the first rewrites the same rows, which is what a
+                    # daily full refresh does.
+                    elapsed = 0.0
+                    for index, symbol in enumerate(symbols):
+                        data = payload(index)
+                        started = time.perf_counter()
+                        store_stock_data(symbol, data)
+                        elapsed += time.perf_counter() - started
+                    return elapsed
+
+                log(f'Ingesting {symbol_count} symbols x {years} years')
+                results['ingest'] = summarize([ingest() for _ in range(repeat)], symbol_count * years * TRADING_DAYS_PER_YEAR)
+
+                log('Backtesting')
+                price_cache.invalidate()
+                results['backtest_cold'] = timed(lambda: (price_cache.invalidate(), [run_backtest(symbol, 10000, 20, 50) for symbol in sampled]), repeat, len(sampled))
+                results['backtest_warm'] = timed(lambda: [run_backtest(symbol, 10000, 20, 50) for symbol in sampled], repeat, len(sampled))
+                results['backtest_portfolio'] = timed(lambda: run_portfolio_backtest(symbols, 10000, 20, 50), repeat, symbol_count)
+
+                log('Predicting')
+                results['predict_batch'] = timed(lambda: (cache.clear(), predict_batch(symbols)), repeat, symbol_count)
+
+                upstream = FakeUpstream(lambda symbol: payload(symbols.index(symbol)))
+
+                def predict_with_refresh():
+                    # Pretend the last fetch was yesterday so each prediction
+                    # goes through a compact upstream refresh (coalescing is
+                    # off for the run, so no refresh is answered from the
+                    # previous one).
+                    SymbolWatermark.objects.filter(symbol__in=sampled).update(last_fetched_at=timezone.now() - timedelta(days=1))
+                    for symbol in sampled:
+                        predict_stock(symbol)
+
+                with mock.patch('api.services.get_session', return_value=upstream):
+                    results['predict_stock'] = timed(predict_with_refresh, repeat, len(sampled))
+
+                log('Rendering reports')
+                factory = RequestFactory()
+                view = GenerateReportView.as_view()
+
+                def render_reports():
+                    # As in Django's test client, closing a response must not
+                    # close the connection holding the open transaction.
+                    request_finished.disconnect(close_old_connections)
+                    try:
+                        for symbol in sampled:
+                            response = view(factory.get('/api/generate-report/', {'symbol': symbol}))
+                            b''.join(response.streaming_content)
+                            response.close()
+                    finally:
+                        request_finished.connect(close_old_connections)
+
+                def clear_report_cache():
+                    for root, _, files in os.walk(settings.REPORT_CACHE_DIR):
+                        for name in files:
+                            os.remove(os.path.join(root, name))
+
+                results['report_cold'] = timed(lambda: (clear_report_cache(), render_reports()), repeat, len(sampled))
+                results['report_warm'] = timed(render_reports, repeat, len(sampled))
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            price_cache.invalidate()
+            cache.clear()
+
+    return {
+        'scale': scale,
+        'symbols': symbol_count,
+        'years': years,
+        'sample': min(sample, symbol_count),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'numpy': np.__version__,
+            'database': connection.vendor,
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.15):
+    # (scenario, baseline seconds, current seconds, ratio, regressed) for each
+    # scenario in both runs, comparing the fastest run of each.
+    rows = []
+    for scenario, result in current['results'].items():
+        previous = baseline['results'].get(scenario)
+        if previous is None:
+            continue
+        ratio = result['min'] / previous['min'] if previous['min'] else float('inf')
+        rows.append((scenario, previous['min'], result['min'], ratio, ratio > 1 + threshold))
+    return rows
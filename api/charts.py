@@ -0,0 +1,45 @@
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from .downsampling import downsample
+import io
+
+# Charts are drawn on a private Figure/Agg canvas per call instead of through
+# pyplot's global state, so concurrent requests never share a figure and
+# nothing is left registered after the render. Fonts and line styles are
+# built once and shared by every render. Series longer than max_points are
+# reduced with LTTB first; a 10in line at 100dpi cannot show more than about a
+# thousand distinct points anyway.
+
+CHART_SIZE = (10, 5)
+CHART_DPI = 100
+
+TITLE_FONT = FontProperties(size=14, weight='bold')
+LABEL_FONT = FontProperties(size=11)
+LEGEND_FONT = FontProperties(size=10)
+
+HISTORICAL_STYLE = {'label': 'Historical Prices', 'color': 'blue', 'linewidth': 1.2}
+PREDICTED_STYLE = {'label': 'Predicted Prices', 'color': 'red', 'linestyle': '--', 'linewidth': 1.2}
+
+
+def render_price_chart(symbol, historical_dates, historical_prices, predicted_dates, predicted_prices, size=CHART_SIZE, dpi=CHART_DPI, max_points=None):
+    if max_points:
+        historical_dates, historical_prices = downsample(historical_dates, historical_prices, max_points)
+        predicted_dates, predicted_prices = downsample(predicted_dates, predicted_prices, max_points)
+
+    figure = Figure(figsize=size, dpi=dpi)
+    canvas = FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+
+    if len(historical_dates):
+        axes.plot(historical_dates, historical_prices, **HISTORICAL_STYLE)
+    axes.plot(predicted_dates, predicted_prices, **PREDICTED_STYLE)
+    axes.set_xlabel('Date', fontproperties=LABEL_FONT)
+    axes.set_ylabel('Price', fontproperties=LABEL_FONT)
+    axes.set_title(f'Performance Report for {symbol}', fontproperties=TITLE_FONT)
+    axes.legend(prop=LEGEND_FONT)
+    axes.grid()
+
+    buffer = io.BytesIO()
+    canvas.print_png(buffer)
+    return buffer.getvalue()
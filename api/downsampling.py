@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keep the first and last points, split
+    # the rest into threshold - 2 buckets and from each keep the point that
+    # forms the largest triangle with the point kept from the previous bucket
+    # and the mean of the next one. Each selection depends on the previous,
+    # so buckets are walked in order, but every bucket is scored in one numpy
+    # operation and the number of Python steps depends only on threshold.
+    n = len(x)
+    if threshold is None or threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    every = (n - 2) / (threshold - 2)
+    edges = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+
+    # Mean of every bucket, with the final point standing in after the last.
+    counts = ends - starts
+    cumulative_x = np.concatenate(([0.0], np.cumsum(x)))
+    cumulative_y = np.concatenate(([0.0], np.cumsum(y)))
+    mean_x = np.append((cumulative_x[ends] - cumulative_x[starts]) / counts, x[-1])
+    mean_y = np.append((cumulative_y[ends] - cumulative_y[starts]) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        bucket_x, bucket_y = x[start:end], y[start:end]
+        areas = np.abs(
+            (x[previous] - mean_x[bucket + 1]) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (mean_y[bucket + 1] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample(dates, values, threshold):
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    values = np.asarray(values, dtype=np.float64)
+    if threshold is None or len(dates) <= threshold:
+        return dates, values
+
+    indices = lttb_indices(dates.astype(np.int64), values, threshold)
+    return dates[indices], values[indices]
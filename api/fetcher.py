@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from .models import SymbolWatermark
+from .services import plan_fetch, request_daily_series, store_stock_data
+import asyncio
+import httpx
+import random
+import threading
+import time
+import requests
+
+
+class TokenBucket:
+    # Hands out tokens at `rate_per_minute`, allowing a burst of up to
+    # `capacity` when the bucket has been idle. A burst comes on top of the
+    # refill, so any 60 s window can see up to rate + capacity - 1 tokens;
+    # the default capacity of one keeps that within the per-minute quota.
+    def __init__(self, rate_per_minute, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(self.capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self):
+        # 0 once a token is taken, otherwise the seconds until one is due.
+        with self._lock:
+            self._refill()
+            # Tolerates the rounding left over from summing refills.
+            if self.tokens >= 1 - 1e-9:
+                self.tokens = max(0.0, self.tokens - 1)
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        wait = self._take()
+        while wait:
+            self._sleep(wait)
+            wait = self._take()
+
+    async def aacquire(self):
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+
+_upstream_bucket = None
+_upstream_bucket_lock = threading.Lock()
+
+
+def get_upstream_bucket():
+    # The process-wide limit shared by bulk fetches and the async views.
+    global _upstream_bucket
+    if _upstream_bucket is None:
+        with _upstream_bucket_lock:
+            if _upstream_bucket is None:
+                _upstream_bucket = TokenBucket(settings.ALPHA_VANTAGE_REQUESTS_PER_MINUTE)
+    return _upstream_bucket
+
+
+def is_retryable(error):
+    return isinstance(error, (requests.RequestException, httpx.HTTPError)) or getattr(error, 'retryable', False)
+
+
+def retry_delay(attempt, backoff):
+    return backoff * 2 ** (attempt - 1) + random.uniform(0, backoff)
+
+
+def fetch_with_retry(symbol, bucket, outputsize='compact', max_retries=None, backoff=1.0, sleep=time.sleep):
+    max_retries = settings.FETCH_MAX_RETRIES if max_retries is None else max_retries
+
+    attempt = 0
+    while True:
+        attempt += 1
+        bucket.acquire()
+        try:
+            return request_daily_series(symbol, outputsize), attempt
+        except Exception as e:
+            if not is_retryable(e) or attempt > max_retries:
+                e.attempts = attempt
+                raise
+            sleep(retry_delay(attempt, backoff))
+
+
+def fetch_many(symbols, outputsize=None, max_workers=None, rate_per_minute=None, max_retries=None, backoff=1.0, force=False):
+    max_workers = max_workers or settings.FETCH_MAX_WORKERS
+    bucket = TokenBucket(rate_per_minute) if rate_per_minute else get_upstream_bucket()
+    symbols = list(dict.fromkeys(symbols))
+    watermarks = {watermark.symbol: watermark for watermark in SymbolWatermark.objects.filter(symbol__in=symbols)}
+
+    results = {}
+    plans = {}
+    for symbol in symbols:
+        plan = plan_fetch(watermarks.get(symbol), force=force)
+        if plan is None:
+            results[symbol] = {'symbol': symbol, 'status': 'skipped', 'rows': 0, 'attempts': 0, 'error': None}
+        else:
+            plans[symbol] = outputsize or plan
+
+    # Network calls overlap on the thread pool; rows are written from this
+    # thread as each payload arrives, so worker threads never hold a DB
+    # connection.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_with_retry, symbol, bucket, plan, max_retries, backoff): symbol
+            for symbol, plan in plans.items()
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            watermark = watermarks.get(symbol)
+            try:
+                data, attempts = future.result()
+                rows = store_stock_data(symbol, data, since=watermark.latest_date if watermark else None)
+                results[symbol] = {'symbol': symbol, 'status': 'ok', 'rows': rows, 'attempts': attempts, 'error': None}
+            except Exception as e:
+                results[symbol] = {'symbol': symbol, 'status': 'failed', 'rows': 0, 'attempts': getattr(e, 'attempts', 1), 'error': str(e)}
+
+    return [results[symbol] for symbol in symbols]
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.models import StockPrice
+from api.price_archive import archive_symbol
+from datetime import date, timedelta
+
+class Command(BaseCommand):
+    help = 'Move stored prices older than a cutoff out of the database into the memory-mapped archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', type=str, help='Stock symbols (defaults to every stored symbol)')
+        parser.add_argument('--keep-years', type=int, default=2, help='Years of recent history that stay in the database')
+        parser.add_argument('--before', type=date.fromisoformat, help='Archive rows dated before this day instead of using --keep-years')
+
+    def handle(self, *args, **options):
+        # At least a year stays in the table: predictions and incremental
+        # fetches only ever read recent rows.
+        today = timezone.now().date()
+        latest_cutoff = today - timedelta(days=365)
+        before = options['before'] or date(today.year - options['keep_years'], today.month, 1)
+        if before > latest_cutoff:
+            raise CommandError(f'Refusing to archive rows newer than {latest_cutoff}')
+
+        symbols = options['symbols'] or list(StockPrice.objects.filter(date__lt=before).values_list('symbol', flat=True).distinct().order_by('symbol'))
+        total = 0
+        for symbol in symbols:
+            moved = archive_symbol(symbol, before)
+            total += moved
+            if moved:
+                self.stdout.write(f'{symbol}: archived {moved} rows')
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} rows dated before {before} for {len(symbols)} symbols'))
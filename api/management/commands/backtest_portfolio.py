@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.backtest import run_portfolio_backtest
+from api.serializers import BacktestBatchSerializer
+
+class Command(BaseCommand):
+    help = 'Backtest the moving average crossover strategy over a portfolio of symbols.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', type=str, help='Stock symbols')
+        parser.add_argument('--file', type=str, help='File with one stock symbol per line')
+        parser.add_argument('--initial-investment', type=float, default=10000.0)
+        parser.add_argument('--short-ma', type=int, required=True)
+        parser.add_argument('--long-ma', type=int, required=True)
+        parser.add_argument('--workers', type=int, help='Worker processes (defaults to BACKTEST_MAX_WORKERS)')
+
+    def handle(self, *args, **options):
+        symbols = list(options['symbols'])
+        if options['file']:
+            with open(options['file']) as f:
+                symbols += [line.strip() for line in f if line.strip()]
+
+        serializer = BacktestBatchSerializer(data={
+            'symbols': symbols,
+            'initial_investment': options['initial_investment'],
+            'short_ma': options['short_ma'],
+            'long_ma': options['long_ma'],
+        })
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+
+        data = serializer.validated_data
+        try:
+            result = run_portfolio_backtest(data['symbols'], data['initial_investment'], data['short_ma'], data['long_ma'], max_workers=options['workers'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for symbol, summary in result['results'].items():
+            self.stdout.write(f"{symbol}: return {summary['total_return']:.2f}%, max drawdown {summary['max_drawdown']:.2f}%, {summary['number_of_trades']} trades")
+        for symbol, error in result['failures'].items():
+            self.stderr.write(self.style.ERROR(f'{symbol}: {error}'))
+
+        portfolio = result['portfolio']
+        if portfolio:
+            self.stdout.write(self.style.SUCCESS(
+                f"Portfolio of {portfolio['symbols']} symbols: return {portfolio['total_return']:.2f}%, max drawdown {portfolio['max_drawdown']:.2f}%"
+            ))
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.charts import render_price_chart
+import numpy as np
+import time
+
+class Command(BaseCommand):
+    help = 'Time report chart rendering for growing price histories, with and without downsampling.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lengths', nargs='+', type=int, default=[1000, 10000, 50000, 100000], help='History lengths in daily bars')
+        parser.add_argument('--max-points', type=int, default=settings.CHART_MAX_POINTS)
+        parser.add_argument('--repeat', type=int, default=3, help='Renders per measurement; the fastest is reported')
+
+    def render_time(self, dates, prices, predicted_dates, predicted_prices, max_points, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render_price_chart('BENCH', dates, prices, predicted_dates, predicted_prices, max_points=max_points)
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        self.stdout.write(f"{'bars':>10} {'full (ms)':>12} {'lttb (ms)':>12}")
+
+        for length in options['lengths']:
+            dates = np.datetime64('1970-01-01') + np.arange(length).astype('timedelta64[D]')
+            prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+            predicted_dates = dates[-1] + np.arange(1, 31).astype('timedelta64[D]')
+            predicted_prices = np.full(30, prices[-1])
+
+            full = self.render_time(dates, prices, predicted_dates, predicted_prices, None, options['repeat'])
+            reduced = self.render_time(dates, prices, predicted_dates, predicted_prices, options['max_points'], options['repeat'])
+            self.stdout.write(f'{length:>10} {full:>12.1f} {reduced:>12.1f}')
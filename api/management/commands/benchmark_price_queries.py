@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Avg
+from api.models import StockPrice
+from datetime import date, timedelta
+import numpy as np
+import statistics
+import time
+
+SYMBOL_PREFIX = 'BENCH'
+
+class Command(BaseCommand):
+    help = 'Fill StockPrice with synthetic rows and report query plans and timings for the time-series reads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000, help='Synthetic rows to insert')
+        parser.add_argument('--symbols', type=int, default=200, help='Synthetic symbols the rows are spread over')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+        parser.add_argument('--analyze', action='store_true', help='Use EXPLAIN ANALYZE where the backend supports it')
+        parser.add_argument('--keep', action='store_true', help='Commit the synthetic rows instead of rolling them back')
+
+    def populate(self, rows, symbols):
+        StockPrice.objects.filter(symbol__startswith=SYMBOL_PREFIX).delete()
+        names = [f'{SYMBOL_PREFIX}{i:04d}' for i in range(symbols)]
+        days = max(rows // symbols, 1)
+        rng = np.random.default_rng(0)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, symbols)), axis=0))
+
+        # Day-major insertion, like daily ingestion, so the physical order of
+        # the table follows date.
+        start = date(1990, 1, 1)
+        batch = []
+        for day in range(days):
+            current = start + timedelta(days=day)
+            for column, symbol in enumerate(names):
+                close = round(float(closes[day, column]), 2)
+                batch.append(StockPrice(symbol=symbol, date=current, open_price=close, high_price=close, low_price=close, close_price=close, volume=1000))
+            if len(batch) >= 10000:
+                StockPrice.objects.bulk_create(batch)
+                batch = []
+        StockPrice.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {StockPrice._meta.db_table}')
+        return names, start, start + timedelta(days=days - 1)
+
+    def measure(self, label, queryset, repeat, analyze):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+
+        options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{label}: min {min(timings):.2f} ms, median {statistics.median(timings):.2f} ms'))
+        self.stdout.write(queryset.explain(**options))
+        self.stdout.write('')
+
+    def handle(self, *args, **options):
+        # Everything runs in one transaction that is rolled back at the end,
+        # so other connections never see the synthetic rows.
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(not options['keep'])
+
+    def run(self, options):
+        started = time.perf_counter()
+        names, first, last = self.populate(options['rows'], options['symbols'])
+        self.stdout.write(f"Inserted {options['rows']} rows for {len(names)} symbols in {time.perf_counter() - started:.1f} s on {connection.vendor}\n")
+
+        symbol = names[len(names) // 2]
+        middle = first + (last - first) / 2
+        repeat, analyze = options['repeat'], options['analyze']
+        self.measure('Full series (date, close) for one symbol',
+                     StockPrice.objects.filter(symbol=symbol).order_by('date').values_list('date', 'close_price'), repeat, analyze)
+        self.measure('Latest 60 bars for one symbol',
+                     StockPrice.objects.filter(symbol=symbol).order_by('-date').values_list('date', 'close_price')[:60], repeat, analyze)
+        self.measure('Closes for ten symbols',
+                     StockPrice.objects.filter(symbol__in=names[:10]).order_by('symbol', 'date').values_list('symbol', 'date', 'close_price'), repeat, analyze)
+        self.measure('Average close across all symbols over 30 days',
+                     StockPrice.objects.filter(date__range=(middle, middle + timedelta(days=30))).values('symbol').annotate(average=Avg('close_price')), repeat, analyze)
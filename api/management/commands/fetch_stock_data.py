@@ -1,16 +1,42 @@
-from django.core.management.base import BaseCommand
-from api.services import fetch_stock_data
+from django.core.management.base import BaseCommand, CommandError
+from api.fetcher import fetch_many
 
 class Command(BaseCommand):
     help = 'Fetch and store stock data.'
 
     def add_arguments(self, parser):
-        parser.add_argument('symbol', type=str, help='Stock symbol')
+        parser.add_argument('symbols', nargs='*', type=str, help='Stock symbols')
+        parser.add_argument('--file', type=str, help='File with one stock symbol per line')
+        parser.add_argument('--outputsize', choices=['compact', 'full'], help='Override the watermark-driven output size')
+        parser.add_argument('--force', action='store_true', help='Fetch symbols even if they were already refreshed today')
+        parser.add_argument('--workers', type=int, help='Concurrent fetches (defaults to FETCH_MAX_WORKERS)')
+        parser.add_argument('--rate', type=int, help='Upstream requests per minute (defaults to ALPHA_VANTAGE_REQUESTS_PER_MINUTE)')
+        parser.add_argument('--retries', type=int, help='Retries per symbol (defaults to FETCH_MAX_RETRIES)')
 
     def handle(self, *args, **options):
-        symbol = options['symbol']
-        try:
-            fetch_stock_data(symbol)
-            self.stdout.write(self.style.SUCCESS(f'Successful fetch for {symbol}'))
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f'Error: {str(e)}'))
+        symbols = list(options['symbols'])
+        if options['file']:
+            with open(options['file']) as f:
+                symbols += [line.strip() for line in f if line.strip()]
+        if not symbols:
+            raise CommandError('Provide at least one symbol or --file.')
+
+        results = fetch_many(
+            symbols,
+            outputsize=options['outputsize'],
+            max_workers=options['workers'],
+            rate_per_minute=options['rate'],
+            max_retries=options['retries'],
+            force=options['force'],
+        )
+
+        for result in results:
+            if result['status'] == 'ok':
+                self.stdout.write(self.style.SUCCESS(f"Successful fetch for {result['symbol']}: {result['rows']} new rows in {result['attempts']} attempt(s)"))
+            elif result['status'] == 'skipped':
+                self.stdout.write(f"Skipped {result['symbol']}: already current for today")
+            else:
+                self.stderr.write(self.style.ERROR(f"Error: {result['symbol']} failed after {result['attempts']} attempt(s): {result['error']}"))
+
+        counts = {status: sum(1 for result in results if result['status'] == status) for status in ('ok', 'skipped', 'failed')}
+        self.stdout.write(f"{counts['ok']} succeeded, {counts['skipped']} skipped, {counts['failed']} failed")
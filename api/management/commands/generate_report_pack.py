@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.report_pack import stream_report_pack
+from api.serializers import ReportPackSerializer
+import json
+import zipfile
+
+class Command(BaseCommand):
+    help = 'Render PDF reports for many symbols in parallel into a single ZIP archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', type=str, help='Stock symbols')
+        parser.add_argument('--file', type=str, help='File with one stock symbol per line')
+        parser.add_argument('--output', type=str, default='reports.zip', help='Path of the ZIP archive to write')
+        parser.add_argument('--workers', type=int, help='Worker processes (defaults to REPORT_PACK_MAX_WORKERS)')
+
+    def handle(self, *args, **options):
+        symbols = list(options['symbols'])
+        if options['file']:
+            with open(options['file']) as f:
+                symbols += [line.strip() for line in f if line.strip()]
+
+        serializer = ReportPackSerializer(data={'symbols': symbols})
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+
+        with open(options['output'], 'wb') as f:
+            for chunk in stream_report_pack(serializer.validated_data['symbols'], max_workers=options['workers']):
+                f.write(chunk)
+
+        with zipfile.ZipFile(options['output']) as archive:
+            manifest = json.loads(archive.read('manifest.json'))
+        for symbol, error in manifest['failures'].items():
+            self.stderr.write(self.style.ERROR(f'{symbol}: {error}'))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(manifest['generated'])} reports to {options['output']}, {len(manifest['failures'])} failed"))
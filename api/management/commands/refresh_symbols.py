@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.services import UpstreamError, parse_listing, request_listing, store_symbols
+import requests
+
+class Command(BaseCommand):
+    help = 'Refresh the local symbol directory from the Alpha Vantage LISTING_STATUS listing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=str, help='Load the listing from a local LISTING_STATUS CSV instead of the API')
+
+    def handle(self, *args, **options):
+        try:
+            if options['file']:
+                with open(options['file']) as f:
+                    text = f.read()
+            else:
+                text = request_listing()
+            stored, removed = store_symbols(parse_listing(text))
+        except (UpstreamError, requests.RequestException, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'Symbol directory refreshed: {stored} symbols, {removed} removed'))
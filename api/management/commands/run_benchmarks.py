@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmarks import SCALES, compare, is_test_database, run_suite
+import json
+
+class Command(BaseCommand):
+    help = 'Time the ingestion, backtest, prediction and report hot paths on synthetic data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small', help='Symbols x years of history: ' + ', '.join(f'{name}={symbols}x{years}' for name, (symbols, years) in SCALES.items()))
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario; the fastest is compared')
+        parser.add_argument('--sample', type=int, default=20, help='Symbols used by the per-symbol scenarios')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this path')
+        parser.add_argument('--compare', type=str, help='Baseline JSON from an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=0.15, help='Slowdown ratio over the baseline counted as a regression')
+        parser.add_argument('--yes', action='store_true', help='Run even though the database is not a test database')
+
+    def handle(self, *args, **options):
+        # The suite writes its synthetic data to the configured database
+        # (rolled back afterwards, but it still locks the tables meanwhile).
+        if not options['yes'] and not is_test_database():
+            raise CommandError('The database is not a test database; pass --yes to run the benchmarks against it anyway')
+
+        results = run_suite(options['scale'], options['repeat'], options['sample'], options['seed'], log=self.stdout.write)
+
+        for scenario, result in results['results'].items():
+            self.stdout.write(f"{scenario:>20} {result['min'] * 1000:>10.1f} ms min {result['median'] * 1000:>10.1f} ms median ({result['items']} items)")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            if (baseline['scale'], baseline['sample']) != (results['scale'], results['sample']):
+                self.stderr.write(self.style.WARNING('Baseline was recorded with a different scale or sample; ratios are not comparable'))
+
+            regressions = []
+            for scenario, before, after, ratio, regressed in compare(results, baseline, options['threshold']):
+                line = f'{scenario:>20} {before * 1000:>10.1f} ms -> {after * 1000:>10.1f} ms ({ratio:.2f}x)'
+                self.stdout.write(self.style.ERROR(line) if regressed else line)
+                if regressed:
+                    regressions.append(scenario)
+            if regressions:
+                raise CommandError(f"Regressions beyond {options['threshold']:.0%}: {', '.join(regressions)}")
+            self.stdout.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,249 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+# Counters and histograms kept in process memory. With METRICS_DIR set, each
+# process also writes a snapshot of its values to <METRICS_DIR>/<pid>.json
+# (at most every METRICS_FLUSH_INTERVAL seconds) and the exposition endpoint
+# sums the snapshots of every live worker, so any worker can answer a scrape.
+# A process flushes once more on exit, and the snapshots of processes that
+# are gone are deleted at the next scrape.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Timings of the request being served, reported as Server-Timing.
+request_timings = ContextVar('request_timings', default=None)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        with registry.lock:
+            self.values[self._key(labels)] += amount
+        registry.maybe_flush()
+
+    def snapshot(self):
+        return {'values': [[list(key), value] for key, value in self.values.items()]}
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with registry.lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+        registry.maybe_flush()
+
+    @contextmanager
+    def time(self, timing=None, **labels):
+        # Observes the duration of the block and, inside a request, adds it to
+        # that request's Server-Timing header under `timing`.
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(elapsed, **labels)
+            if timing:
+                record_timing(timing, elapsed)
+
+    def snapshot(self):
+        # The counts are copied: observe() keeps updating the list in place.
+        return {'buckets': list(self.buckets), 'values': [[list(key), list(counts), total] for key, (counts, total) in self.values.items()]}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._flushed_at = 0.0
+
+    def register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {'kind': metric.kind, 'help': metric.help, 'labelnames': list(metric.labelnames), **metric.snapshot()}
+                for name, metric in self.metrics.items()
+            }
+
+    def maybe_flush(self):
+        if settings.METRICS_DIR and time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if not settings.METRICS_DIR:
+            return
+        self._flushed_at = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=settings.METRICS_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json'))
+
+    def collect(self):
+        # This process's values, plus every other worker's last snapshot.
+        snapshots = [self.snapshot()]
+        if settings.METRICS_DIR and os.path.isdir(settings.METRICS_DIR):
+            self.flush()
+            snapshots = []
+            for name in os.listdir(settings.METRICS_DIR):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(settings.METRICS_DIR, name)
+                pid = name[:-len('.json')]
+                if pid.isdigit() and not process_exists(int(pid)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return merge_snapshots(snapshots)
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+
+def process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Alive, but owned by another user.
+        pass
+    return True
+
+
+def merge_snapshots(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, 'values': {}})
+            for value in metric['values']:
+                key = tuple(value[0])
+                if metric['kind'] == 'counter':
+                    target['values'][key] = target['values'].get(key, 0.0) + value[1]
+                else:
+                    counts, total = target['values'].get(key, ([0] * len(value[1]), 0.0))
+                    target['values'][key] = ([a + b for a, b in zip(counts, value[1])], total + value[2])
+    return merged
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def exposition(metrics=None):
+    # Prometheus text exposition format, version 0.0.4.
+    lines = []
+    for name, metric in sorted((metrics if metrics is not None else registry.collect()).items()):
+        # A counter's samples are named <name>_total, and so must be its
+        # HELP and TYPE lines.
+        family = f'{name}_total' if metric['kind'] == 'counter' else name
+        lines.append(f"# HELP {family} {metric['help']}")
+        lines.append(f"# TYPE {family} {metric['kind']}")
+        for key, value in sorted(metric['values'].items()):
+            if metric['kind'] == 'counter':
+                lines.append(f"{family}{_format_labels(metric['labelnames'], key)} {_format_number(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(list(metric['buckets']) + [math.inf], counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{name}_bucket{_format_labels(metric['labelnames'], key, [le])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(metric['labelnames'], key)} {_format_number(total)}")
+            lines.append(f"{name}_count{_format_labels(metric['labelnames'], key)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+
+def record_timing(name, seconds):
+    timings = request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def server_timing_header(timings):
+    # Repeated names (e.g. several upstream calls) are summed.
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ', '.join(f'{name};dur={seconds * 1000:.1f}' for name, seconds in totals.items())
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+http_requests = registry.counter('http_requests', 'HTTP requests served.', ('view', 'method', 'status'))
+http_request_duration = registry.histogram('http_request_duration_seconds', 'Time spent serving HTTP requests.', ('view', 'method'))
+db_queries = registry.histogram('db_queries_per_request', 'ORM queries executed per HTTP request.', ('view',), buckets=COUNT_BUCKETS)
+upstream_requests = registry.counter('upstream_requests', 'Requests made to the Alpha Vantage API.', ('function', 'status'))
+upstream_coalesced = registry.counter('upstream_coalesced', 'Upstream fetches answered by a call made for another caller.', ('function', 'outcome'))
+upstream_duration = registry.histogram('upstream_request_duration_seconds', 'Latency of Alpha Vantage API requests.', ('function',))
+model_load_duration = registry.histogram('model_load_duration_seconds', 'Time spent unpickling prediction models.', ('model',))
+model_inference_duration = registry.histogram('model_inference_duration_seconds', 'Time spent in model.predict.', ('model',))
+chart_render_duration = registry.histogram('chart_render_duration_seconds', 'Time spent rendering report charts.')
+pdf_render_duration = registry.histogram('pdf_render_duration_seconds', 'Time spent rendering report PDFs.')
+backtest_duration = registry.histogram('backtest_duration_seconds', 'Backtest runtime.', ('kind',))
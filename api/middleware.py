@@ -0,0 +1,163 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.urls import Resolver404, resolve
+from .metrics import db_queries, http_request_duration, http_requests, request_timings, server_timing_header
+from .profiling import profile_call, save_profile
+import hmac
+import random
+import time
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# The counter of the request being served. Async ORM calls run in another
+# thread, on that thread's connection, but inside a copy of the request's
+# context, so the wrapper below finds the right counter either way.
+request_queries = ContextVar('request_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    queries = request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.count += 1
+        queries.seconds += time.perf_counter() - started
+
+
+def install_query_counter(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+@receiver(connection_created)
+def _install_query_counter(sender, connection, **kwargs):
+    install_query_counter(connection)
+
+
+class MetricsMiddleware:
+    # Records request latency and ORM query counts per view, and reports the
+    # timings collected while serving the request in a Server-Timing header.
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported.
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings, queries = [], QueryCounter()
+        tokens = request_timings.set(timings), request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timings.reset(tokens[0])
+            request_queries.reset(tokens[1])
+        return self.record(request, response, timings, queries, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings, queries = [], QueryCounter()
+        tokens = request_timings.set(timings), request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_timings.reset(tokens[0])
+            request_queries.reset(tokens[1])
+        return self.record(request, response, timings, queries, time.perf_counter() - started)
+
+    def record(self, request, response, timings, queries, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        http_requests.inc(view=view, method=request.method, status=response.status_code)
+        http_request_duration.observe(elapsed, view=view, method=request.method)
+        db_queries.observe(queries.count, view=view)
+
+        if settings.METRICS_SERVER_TIMING:
+            timings.append(('total', elapsed))
+            response['Server-Timing'] = f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries", ' + server_timing_header(timings)
+        return response
+
+
+class ProfilingMiddleware:
+    # Runs a request under cProfile when it carries PROFILING_HEADER or the
+    # `profile` query parameter set to PROFILING_TOKEN, or at random for a
+    # PROFILING_SAMPLE_RATE fraction of requests, and saves the profile under
+    # the name of the view (see api/profiling.py). With PROFILING_ENABLED off
+    # Django leaves it out of the middleware chain altogether. Requests to
+    # async views are passed through: cProfile cannot tell one coroutine's
+    # time from that of the others interleaved with it on the event loop.
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+
+        if not self.requested(request) and not (settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE):
+            return self.get_response(request)
+
+        view = self.view_name(request)
+        if view is None:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        response, stats = profile_call(lambda: self.get_response(request))
+        if stats is not None:
+            profile = save_profile(stats, view, request.method, self.profiled_path(request), response.status_code, time.perf_counter() - started)
+            response['X-Profile-Id'] = profile.id
+        return response
+
+    def requested(self, request):
+        token = settings.PROFILING_TOKEN
+        if not token:
+            return False
+        supplied = request.headers.get(settings.PROFILING_HEADER) or request.GET.get('profile')
+        # Compared as bytes: compare_digest only takes ASCII strings.
+        return supplied is not None and hmac.compare_digest(supplied.encode(), token.encode())
+
+    def profiled_path(self, request):
+        # The full path minus the token, which must not end up in the profile.
+        query = request.GET.copy()
+        query.pop('profile', None)
+        return f'{request.path}?{query.urlencode()}' if query else request.path
+
+    def view_name(self, request):
+        # The class name of the view the request resolves to, if it is one
+        # of PROFILING_VIEWS (or any view when that is empty).
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        view_class = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+        name = view_class.__name__ if view_class else match.view_name
+        if settings.PROFILING_VIEWS and name not in settings.PROFILING_VIEWS:
+            return None
+        return name
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+def delete_duplicate_stock_prices(apps, schema_editor):
+    StockPrice = apps.get_model('api', 'StockPrice')
+    duplicates = (
+        StockPrice.objects.values('symbol', 'date')
+        .annotate(latest_id=models.Max('id'), rows=models.Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        StockPrice.objects.filter(symbol=duplicate['symbol'], date=duplicate['date']).exclude(id=duplicate['latest_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_prediction_alter_stockprice_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_stock_prices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stockprice',
+            constraint=models.UniqueConstraint(fields=('symbol', 'date'), name='unique_stockprice_symbol_date'),
+        ),
+    ]
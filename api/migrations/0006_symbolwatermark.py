@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+def backfill_watermarks(apps, schema_editor):
+    StockPrice = apps.get_model('api', 'StockPrice')
+    SymbolWatermark = apps.get_model('api', 'SymbolWatermark')
+    latest = StockPrice.objects.values('symbol').annotate(latest_date=models.Max('date'))
+    SymbolWatermark.objects.bulk_create(
+        [SymbolWatermark(symbol=row['symbol'], latest_date=row['latest_date']) for row in latest],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_stockprice_unique_symbol_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SymbolWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=10, unique=True)),
+                ('latest_date', models.DateField(blank=True, null=True)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_watermarks, migrations.RunPython.noop),
+    ]
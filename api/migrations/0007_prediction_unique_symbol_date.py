@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+
+def delete_duplicate_predictions(apps, schema_editor):
+    Prediction = apps.get_model('api', 'Prediction')
+    duplicates = (
+        Prediction.objects.values('symbol', 'date')
+        .annotate(latest_id=models.Max('id'), rows=models.Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        Prediction.objects.filter(symbol=duplicate['symbol'], date=duplicate['date']).exclude(id=duplicate['latest_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_symbolwatermark'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_predictions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='prediction',
+            constraint=models.UniqueConstraint(fields=('symbol', 'date'), name='unique_prediction_symbol_date'),
+        ),
+    ]
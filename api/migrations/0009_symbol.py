@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Symbol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('exchange', models.CharField(blank=True, max_length=32)),
+                ('asset_type', models.CharField(blank=True, max_length=32)),
+                ('ipo_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
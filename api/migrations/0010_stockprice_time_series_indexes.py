@@ -0,0 +1,31 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+def create_date_brin_index(apps, schema_editor):
+    # BRIN suits an append-mostly table whose physical order follows date:
+    # date-range scans across all symbols touch only the matching blocks for
+    # a few kilobytes of index. It only exists on PostgreSQL.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS stockprice_date_brin ON api_stockprice USING brin (date)')
+
+
+def drop_date_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS stockprice_date_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_symbol'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockprice',
+            index=models.Index(fields=['symbol', 'date', 'close_price'], name='stockprice_symbol_date_close'),
+        ),
+        migrations.RunPython(create_date_brin_index, drop_date_brin_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_stockprice_time_series_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockprice',
+            name='close_price',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='stockprice',
+            name='high_price',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='stockprice',
+            name='low_price',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='stockprice',
+            name='open_price',
+            field=models.FloatField(),
+        ),
+    ]
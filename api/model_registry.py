@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.utils import timezone
+from .metrics import model_load_duration
+import hashlib
+import logging
+import os
+import threading
+import time
+import dill
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class LoadedModel:
+    def __init__(self, name, path, model, version, stat, load_seconds):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.version = version
+        self.stat = stat
+        self.load_seconds = load_seconds
+        self.loaded_at = timezone.now()
+
+    def info(self):
+        return {
+            'name': self.name,
+            'path': self.path,
+            'version': self.version,
+            'load_seconds': self.load_seconds,
+            'loaded_at': self.loaded_at.isoformat(),
+        }
+
+
+class ModelRegistry:
+    # Keeps one unpickled copy of each model per process. The file is only
+    # stat()ed on lookup; it is re-hashed when its mtime or size moves and
+    # reloaded only if the content actually changed.
+    def __init__(self):
+        self._paths = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def register(self, name, path):
+        with self._lock:
+            self._paths[name] = path
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        return self.get_loaded(name).model
+
+    def get_loaded(self, name):
+        path = self._paths[name]
+        stat = os.stat(path)
+        loaded = self._loaded.get(name)
+        if loaded is not None and self._same_file(loaded.stat, stat):
+            return loaded
+
+        with self._load_locks[name]:
+            # Another thread may have finished the reload while we waited.
+            loaded = self._loaded.get(name)
+            stat = os.stat(path)
+            if loaded is not None and self._same_file(loaded.stat, stat):
+                return loaded
+
+            version = file_digest(path)
+            if loaded is not None and loaded.version == version:
+                loaded.stat = stat
+                return loaded
+
+            started = time.perf_counter()
+            with model_load_duration.time('model_load', model=name), open(path, 'rb') as f:
+                model = dill.load(f)
+            loaded = LoadedModel(name, path, model, version, stat, time.perf_counter() - started)
+            self._loaded[name] = loaded
+            logger.info(f"Loaded model {name} version {version} in {loaded.load_seconds:.3f}s")
+            return loaded
+
+    def _same_file(self, old, new):
+        return (old.st_mtime_ns, old.st_size) == (new.st_mtime_ns, new.st_size)
+
+    def warm_up(self):
+        for name in list(self._paths):
+            try:
+                self.get_loaded(name)
+            except Exception as e:
+                logger.warning(f"Could not warm up model {name}: {e}")
+
+    def info(self):
+        return {name: loaded.info() for name, loaded in self._loaded.items()}
+
+
+model_registry = ModelRegistry()
+
+
+def warm_up_models():
+    # Called by the WSGI/ASGI entry points rather than AppConfig.ready(), so
+    # management commands and test runs do not unpickle every model.
+    if not settings.MODEL_WARMUP:
+        return
+    from . import services  # registers the default model
+
+    model_registry.warm_up()
@@ -1,11 +1,7 @@
 from django.db import models
+import uuid
 
 
-class Meta:
-        unique_together = ('symbol', 'date')
-
-def __str__(self):
-        return f"{self.symbol} - {self.date}"
 class Item(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -18,17 +14,54 @@ class Item(models.Model):
 class StockPrice(models.Model):
     symbol = models.CharField(max_length=10)
     date = models.DateField()
-    open_price = models.DecimalField(max_digits=10, decimal_places=2)
-    high_price = models.DecimalField(max_digits=10, decimal_places=2)
-    low_price = models.DecimalField(max_digits=10, decimal_places=2)
-    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+    open_price = models.FloatField()
+    high_price = models.FloatField()
+    low_price = models.FloatField()
+    close_price = models.FloatField()
     volume = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['symbol', 'date'], name='unique_stockprice_symbol_date'),
+        ]
+        # Covers (date, close) reads for a symbol so they are answered from
+        # the index alone. close_price is a key column rather than INCLUDE so
+        # this works on every backend. PostgreSQL additionally gets a BRIN
+        # index on date, created in migration 0010.
+        indexes = [
+            models.Index(fields=['symbol', 'date', 'close_price'], name='stockprice_symbol_date_close'),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} - {self.date}"
+class SymbolWatermark(models.Model):
+    symbol = models.CharField(max_length=10, unique=True)
+    latest_date = models.DateField(null=True, blank=True)
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.symbol} - {self.latest_date}"
+class Symbol(models.Model):
+    symbol = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=255, blank=True)
+    exchange = models.CharField(max_length=32, blank=True)
+    asset_type = models.CharField(max_length=32, blank=True)
+    ipo_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.symbol} - {self.name}"
 class Prediction(models.Model):
     symbol = models.CharField(max_length=10)
     date = models.DateField()
     predicted_price = models.FloatField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['symbol', 'date'], name='unique_prediction_symbol_date'),
+        ]
+
     def __str__(self):
         return f"{self.symbol} - {self.date}"
 class PredictedStockPrice(models.Model):
@@ -41,3 +74,26 @@ class PredictedStockPrice(models.Model):
 
     def __str__(self):
         return f"{self.symbol} - {self.date} - Predicted: {self.predicted_price}"
+class ReportJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    symbol = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    pdf_path = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.symbol} - {self.status}"
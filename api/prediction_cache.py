@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.cache import cache
+import uuid
+
+# Predictions are cached under (symbol, generation, model version, latest
+# input bar). Ingesting prices for a symbol bumps its generation, which makes
+# every older entry for it unreachable without having to enumerate keys.
+
+
+def _generation_key(symbol):
+    return f'prediction-generation:{symbol}'
+
+
+def _generations(symbols):
+    keys = {symbol: _generation_key(symbol) for symbol in symbols}
+    found = cache.get_many(list(keys.values()))
+
+    generations = {}
+    missing = {}
+    for symbol, key in keys.items():
+        if key in found:
+            generations[symbol] = found[key]
+        else:
+            # A lost generation must never fall back to one used before, so
+            # start from a fresh token.
+            generations[symbol] = missing[key] = uuid.uuid4().hex
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return generations
+
+
+def prediction_keys(latest_dates, model_version):
+    generations = _generations(latest_dates)
+    return {
+        symbol: f'prediction:{symbol}:{generations[symbol]}:{model_version}:{latest_date.isoformat()}'
+        for symbol, latest_date in latest_dates.items()
+    }
+
+
+def get_cached_predictions(keys):
+    found = cache.get_many(list(keys.values()))
+    return {symbol: found[key] for symbol, key in keys.items() if key in found}
+
+
+def cache_predictions(keys, predictions):
+    cache.set_many({keys[symbol]: value for symbol, value in predictions.items()}, timeout=settings.PREDICTION_CACHE_TTL)
+
+
+def invalidate_predictions(symbol):
+    cache.set(_generation_key(symbol), uuid.uuid4().hex, timeout=None)
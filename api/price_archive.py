@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.db import transaction
+from .models import StockPrice
+import json
+import numpy as np
+import os
+import re
+import tempfile
+import uuid
+
+# Cold history lives outside the database as one .npy file per column and
+# symbol, memory-mapped on read. A symbol's manifest names the generation of
+# files that is current; rewriting an archive writes a new generation and
+# then swaps the manifest, so readers never see a partly written set. The
+# files of older generations stay until the next rewrite, for the readers
+# still holding the previous manifest.
+
+PRICE_FIELDS = ('date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume')
+COLUMNS = ('dates', 'open', 'high', 'low', 'close', 'volume')
+DTYPES = ('datetime64[D]', np.float64, np.float64, np.float64, np.float64, np.int64)
+SYMBOL_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9.-]{0,19}$')
+
+
+def rows_to_columns(rows):
+    columns = list(zip(*rows)) or [()] * len(PRICE_FIELDS)
+    return tuple(np.array(column, dtype=dtype) for column, dtype in zip(columns, DTYPES))
+
+
+def symbol_directory(symbol):
+    # Symbols reach here straight from requests, so only plain tickers are
+    # turned into paths.
+    if not SYMBOL_PATTERN.match(symbol):
+        raise ValueError(f'Invalid symbol {symbol!r}')
+    return os.path.join(settings.PRICE_ARCHIVE_DIR, symbol)
+
+
+def manifest_path(symbol):
+    return os.path.join(symbol_directory(symbol), 'manifest.json')
+
+
+def archive_version(symbol):
+    if not SYMBOL_PATTERN.match(symbol):
+        return None
+    try:
+        return os.stat(manifest_path(symbol)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_archive(symbol):
+    # A concurrent rewrite can remove the generation named by the manifest we
+    # just read, in which case the new manifest is read again. Symbols that
+    # cannot be archived have no archive.
+    if not SYMBOL_PATTERN.match(symbol):
+        return None
+    for _ in range(3):
+        try:
+            with open(manifest_path(symbol)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        try:
+            return tuple(
+                np.load(os.path.join(symbol_directory(symbol), f"{manifest['generation']}.{column}.npy"), mmap_mode='r')
+                for column in COLUMNS
+            )
+        except FileNotFoundError:
+            continue
+    raise RuntimeError(f"Price archive for {symbol} kept changing while being read")
+
+
+def write_generation(symbol, columns):
+    # Writes the files of a new generation and returns the manifest that
+    # makes it current, without publishing it yet.
+    directory = symbol_directory(symbol)
+    os.makedirs(directory, exist_ok=True)
+    generation = uuid.uuid4().hex[:12]
+
+    for column, values in zip(COLUMNS, columns):
+        path = os.path.join(directory, f'{generation}.{column}.npy')
+        with open(path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(values))
+            f.flush()
+            os.fsync(f.fileno())
+
+    return {'generation': generation, 'rows': int(columns[0].size), 'through': str(columns[0][-1]) if columns[0].size else None}
+
+
+def publish_generation(symbol, manifest):
+    fd, temporary = tempfile.mkstemp(dir=symbol_directory(symbol), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temporary, manifest_path(symbol))
+
+
+def prune_generations(symbol):
+    # Removes every generation but the current one: the one replaced by the
+    # last rewrite and any a failed rewrite wrote but never published, whose
+    # rows are still in the table.
+    try:
+        with open(manifest_path(symbol)) as f:
+            current = json.load(f)['generation']
+    except FileNotFoundError:
+        current = None
+    directory = symbol_directory(symbol)
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith('.npy') and name.split('.')[0] != current:
+            os.remove(os.path.join(directory, name))
+
+
+def merge_series(archived, hot):
+    # Hot rows win where both tiers have a date, e.g. after a full refetch.
+    if archived is None or archived[0].size == 0:
+        return hot
+    if hot[0].size == 0:
+        return archived
+
+    keep = ~np.isin(archived[0], hot[0])
+    merged = tuple(np.concatenate((old[keep], new)) for old, new in zip(archived, hot))
+    if keep.any() and archived[0][keep][-1] > hot[0][0]:
+        order = np.argsort(merged[0], kind='stable')
+        merged = tuple(column[order] for column in merged)
+    return merged
+
+
+def archive_symbol(symbol, before):
+    # Moves every stored row dated before `before` into the archive. The new
+    # generation is published before the delete commits: should the delete
+    # fail, the rows are in both tiers for a while, which merge_series
+    # resolves in favour of the table, but never in neither.
+    prune_generations(symbol)
+    with transaction.atomic():
+        rows = StockPrice.objects.filter(symbol=symbol, date__lt=before).order_by('date')
+        moved = rows_to_columns(rows.values_list(*PRICE_FIELDS))
+        if not moved[0].size:
+            return 0
+
+        publish_generation(symbol, write_generation(symbol, merge_series(load_archive(symbol), moved)))
+        rows.delete()
+    return int(moved[0].size)
@@ -0,0 +1,112 @@
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.db.models import Count, Max, Subquery
+from .models import StockPrice, SymbolWatermark
+from .price_archive import PRICE_FIELDS, archive_version, load_archive, merge_series, rows_to_columns
+import threading
+import numpy as np
+
+
+class PriceSeries(namedtuple('PriceSeries', ['dates', 'open', 'high', 'low', 'close', 'volume'])):
+    __slots__ = ()
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self)
+
+    def __len__(self):
+        return self.dates.size
+
+
+def load_price_series(symbol):
+    # Archived years (memory-mapped .npy columns) merged with the rows still
+    # in the table.
+    rows = StockPrice.objects.filter(symbol=symbol).order_by('date').values_list(*PRICE_FIELDS)
+    series = PriceSeries(*(np.asarray(column) for column in merge_series(load_archive(symbol), rows_to_columns(rows))))
+    # Cached arrays are shared between requests, so nobody gets to mutate them.
+    for column in series:
+        column.setflags(write=False)
+    return series
+
+
+def stored_version(symbol):
+    # Cheap fingerprint of what is stored for a symbol. It changes whenever
+    # another process (e.g. the fetch command) writes rows, so entries built
+    # before that write are never served. Row count and latest date catch
+    # appends; the watermark's fetch time, which every store bumps, catches
+    # days rewritten in place.
+    fetched = SymbolWatermark.objects.filter(symbol=symbol).values('last_fetched_at')
+    version = StockPrice.objects.filter(symbol=symbol).aggregate(rows=Count('id'), latest=Max('date'), fetched=Max(Subquery(fetched)))
+    return version['rows'], version['latest'], version['fetched'], archive_version(symbol)
+
+
+class PriceCache:
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes if self._max_bytes is not None else settings.PRICE_CACHE_MAX_BYTES
+
+    def get(self, symbol):
+        version = stored_version(symbol)
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(symbol)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        series = load_price_series(symbol)
+        self._put(symbol, version, series)
+        return series
+
+    def _put(self, symbol, version, series):
+        with self._lock:
+            self._discard(symbol)
+            if series.nbytes > self.max_bytes:
+                return
+            self._entries[symbol] = (version, series)
+            self._bytes += series.nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def _discard(self, symbol):
+        entry = self._entries.pop(symbol, None)
+        if entry is not None:
+            self._bytes -= entry[1].nbytes
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._discard(symbol)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+price_cache = PriceCache()
+
+
+def get_price_series(symbol):
+    return price_cache.get(symbol)
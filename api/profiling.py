@@ -0,0 +1,142 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime, timezone
+from django.conf import settings
+import cProfile
+import json
+import os
+import pstats
+import re
+import tempfile
+import threading
+import uuid
+
+# Profiles of single requests, taken by ProfilingMiddleware. Each profile is
+# stored as <id>.pstats (load it with pstats or snakeviz), <id>.collapsed
+# (one "frame;frame;frame microseconds" line per stack, the input format of
+# flamegraph.pl and speedscope) and <id>.json with what was profiled.
+
+PROFILE_EXTENSIONS = ('pstats', 'collapsed', 'json')
+PROFILE_ID = re.compile(r'^\d{8}T\d{6}-[A-Za-z0-9_]+-[0-9a-f]{8}$')
+
+# cProfile hooks the whole interpreter on Python 3.12+, and one profiler per
+# thread is all it supports before that, so one request is profiled at a time.
+_profiler_lock = threading.Lock()
+
+Profile = namedtuple('Profile', ['id', 'view', 'method', 'path', 'status', 'duration', 'created'])
+
+
+def frame_label(function):
+    filename, line, name = function
+    if filename == '~':
+        return name
+    return f'{os.path.basename(filename)}:{line}:{name}'
+
+
+def collapsed_stacks(stats, max_depth=64, min_fraction=0.0005):
+    # cProfile keeps caller -> callee totals rather than whole stacks, so the
+    # stacks are rebuilt by walking the call graph down from its roots and
+    # splitting each function's time between its callers in proportion to
+    # what each caller spent in it. Recursive calls end a stack, and branches
+    # worth less than `min_fraction` of the profile are left out, which keeps
+    # the walk from enumerating every path to cheap, widely called helpers.
+    children = defaultdict(list)
+    roots = []
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            roots.append(function)
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            children[caller].append((function, edge_cumulative))
+
+    totals = defaultdict(float)
+    cutoff = stats.total_tt * min_fraction
+
+    def walk(function, share, stack):
+        _, _, own, cumulative, _ = stats.stats[function]
+        stack = stack + (frame_label(function),)
+        totals[stack] += own * share
+        if len(stack) >= max_depth:
+            return
+        for child, edge_cumulative in children[function]:
+            if edge_cumulative * share <= cutoff or frame_label(child) in stack:
+                continue
+            walk(child, share * edge_cumulative / stats.stats[child][3], stack)
+
+    for root in roots:
+        walk(root, 1.0, ())
+    lines = [f"{';'.join(stack)} {round(seconds * 1e6)}" for stack, seconds in totals.items() if round(seconds * 1e6) > 0]
+    return '\n'.join(sorted(lines)) + '\n'
+
+
+def profile_call(function):
+    # Runs `function` under cProfile and returns (its result, pstats.Stats),
+    # or (its result, None) when another request is already being profiled.
+    if not _profiler_lock.acquire(blocking=False):
+        return function(), None
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = function()
+        finally:
+            profiler.disable()
+        return result, pstats.Stats(profiler)
+    finally:
+        _profiler_lock.release()
+
+
+def save_profile(stats, view, method, path, status, duration):
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    profile_id = f"{created:%Y%m%dT%H%M%S}-{re.sub(r'[^A-Za-z0-9_]', '_', view)}-{uuid.uuid4().hex[:8]}"
+
+    stats.dump_stats(profile_path(profile_id, 'pstats'))
+    _write_atomic(directory, profile_path(profile_id, 'collapsed'), collapsed_stacks(stats))
+    # The metadata goes last: a profile is listed once its .json exists.
+    profile = Profile(profile_id, view, method, path, status, round(duration, 6), created.isoformat())
+    _write_atomic(directory, profile_path(profile_id, 'json'), json.dumps(profile._asdict()))
+    prune_profiles()
+    return profile
+
+
+def _write_atomic(directory, path, text):
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+def profile_path(profile_id, extension):
+    if not PROFILE_ID.match(profile_id) or extension not in PROFILE_EXTENSIONS:
+        raise ValueError(f'Invalid profile {profile_id}.{extension}')
+    return os.path.join(settings.PROFILING_DIR, f'{profile_id}.{extension}')
+
+
+def list_profiles(view=None):
+    # Newest first.
+    try:
+        names = os.listdir(settings.PROFILING_DIR)
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    for name in sorted(names, reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILING_DIR, name)) as f:
+                profile = Profile(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            continue
+        if view is None or profile.view == view:
+            profiles.append(profile)
+    return profiles
+
+
+def prune_profiles():
+    for profile in list_profiles()[settings.PROFILING_MAX_PROFILES:]:
+        for extension in PROFILE_EXTENSIONS:
+            try:
+                os.remove(profile_path(profile.id, extension))
+            except FileNotFoundError:
+                pass
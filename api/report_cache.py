@@ -0,0 +1,121 @@
+from collections import namedtuple
+from django.conf import settings
+from datetime import datetime, timezone
+import os
+import re
+import tempfile
+import threading
+import time
+
+ARTIFACT_EXTENSIONS = ('png', 'pdf')
+# A sha256 hexdigest, as produced by reports.report_digest.
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+CachedReport = namedtuple('CachedReport', ['symbol', 'digest', 'png', 'pdf', 'last_modified'])
+
+
+class ReportCache:
+    # Rendered artifacts on disk, named by the digest of everything that went
+    # into them, so identical inputs always map to the same files. A file's
+    # mtime is when it was rendered; its atime is bumped on every hit and is
+    # what least-recently-used eviction goes by.
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def directory(self):
+        return self._directory or settings.REPORT_CACHE_DIR
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes if self._max_bytes is not None else settings.REPORT_CACHE_MAX_BYTES
+
+    def _path(self, digest, extension):
+        return os.path.join(self.directory, digest[:2], f'{digest}.{extension}')
+
+    def get(self, symbol, digest):
+        # Both files are read here: evict() may remove them at any moment
+        # afterwards, and a report it already removed is just a miss.
+        paths = [self._path(digest, extension) for extension in ARTIFACT_EXTENSIONS]
+        contents, stats = [], []
+        try:
+            for path in paths:
+                with open(path, 'rb') as f:
+                    contents.append(f.read())
+                    stats.append(os.fstat(f.fileno()))
+        except FileNotFoundError:
+            with self._counts_lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        for path, stat in zip(paths, stats):
+            try:
+                os.utime(path, (now, stat.st_mtime))
+            except FileNotFoundError:
+                pass
+        with self._counts_lock:
+            self.hits += 1
+        return CachedReport(symbol, digest, *contents, datetime.fromtimestamp(stats[1].st_mtime, tz=timezone.utc))
+
+    def put(self, symbol, digest, png, pdf):
+        paths = []
+        for extension, content in zip(ARTIFACT_EXTENSIONS, (png, pdf)):
+            path = self._path(digest, extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so readers never see a half-written file.
+            fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temporary, path)
+            paths.append(path)
+        last_modified = datetime.fromtimestamp(os.stat(paths[1]).st_mtime, tz=timezone.utc)
+
+        self.evict(keep=digest)
+        return CachedReport(symbol, digest, png, pdf, last_modified)
+
+    def evict(self, keep=None):
+        with self._lock:
+            # A report's PNG and PDF are evicted together, by whichever of the
+            # two was read most recently.
+            reports = {}
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith('.tmp'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    accessed, size, paths = reports.get(name.split('.')[0], (0, 0, []))
+                    reports[name.split('.')[0]] = (max(accessed, stat.st_atime), size + stat.st_size, paths + [path])
+
+            total = sum(size for _, size, _ in reports.values())
+            for digest, (_, size, paths) in sorted(reports.items(), key=lambda item: item[1][0]):
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                with self._counts_lock:
+                    self.evictions += 1
+
+    def stats(self):
+        with self._counts_lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'max_bytes': self.max_bytes}
+
+
+report_cache = ReportCache()
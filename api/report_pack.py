@@ -0,0 +1,109 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from django.conf import settings
+from .models import Prediction
+from .report_cache import report_cache
+from .report_rendering import render_report
+from .reports import chart_max_points, load_report_data, report_digest
+import json
+import zipfile
+
+
+class ZipStream:
+    # Write-only sink for ZipFile. Having no tell() makes ZipFile treat it as
+    # unseekable and emit data descriptors, so the archive can be sent as it
+    # is written.
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def plan_reports(symbols):
+    # Yields (symbol, digest, cached report or None, render job, error) one
+    # symbol at a time, so a symbol's data is only loaded once the consumer
+    # is ready to render or send its report.
+    for symbol in symbols:
+        try:
+            data = load_report_data(symbol)
+        except Prediction.DoesNotExist as e:
+            yield symbol, None, None, None, str(e)
+            continue
+
+        digest = report_digest(symbol, data)
+        yield symbol, digest, report_cache.get(symbol, digest), (symbol, *data, chart_max_points()), None
+
+
+def render(job):
+    try:
+        _, png, pdf = render_report(*job)
+    except Exception as e:
+        return None, None, str(e)
+    return png, pdf, None
+
+
+def iter_rendered(plans, max_workers):
+    # Yields (symbol, digest, png, pdf, error, rendered) for every planned
+    # report: cached reports and failures as they come up, renders as they
+    # finish. A plan is only taken while fewer than two renders per worker
+    # are in flight, so neither report data nor finished reports pile up in
+    # memory while the consumer is still sending earlier ones.
+    plans = iter(plans)
+    running = {}
+    with ExitStack() as stack:
+        executor = None
+        while True:
+            while len(running) < max_workers * 2:
+                plan = next(plans, None)
+                if plan is None:
+                    break
+                symbol, digest, report, job, error = plan
+                if error:
+                    yield symbol, digest, None, None, error, False
+                elif report:
+                    yield symbol, digest, report.png, report.pdf, None, False
+                elif max_workers == 1:
+                    yield symbol, digest, *render(job), True
+                else:
+                    if executor is None:
+                        executor = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
+                    running[executor.submit(render, job)] = (symbol, digest)
+
+            if not running:
+                return
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                symbol, digest = running.pop(future)
+                yield symbol, digest, *future.result(), True
+
+
+def stream_report_pack(symbols, max_workers=None):
+    symbols = list(dict.fromkeys(symbols))
+    max_workers = max_workers or settings.REPORT_PACK_MAX_WORKERS
+
+    stream = ZipStream()
+    generated, failures = [], {}
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for symbol, digest, png, pdf, error, rendered in iter_rendered(plan_reports(symbols), max_workers):
+            if error:
+                failures[symbol] = error
+                continue
+            if rendered:
+                report_cache.put(symbol, digest, png, pdf)
+            archive.writestr(f'{symbol}.pdf', pdf)
+            archive.writestr(f'{symbol}.png', png)
+            generated.append(symbol)
+            yield stream.drain()
+
+        archive.writestr('manifest.json', json.dumps({'generated': generated, 'failures': failures}, indent=2))
+    yield stream.drain()
@@ -0,0 +1,27 @@
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from .charts import render_price_chart
+import io
+
+# Rendering is kept free of Django imports so report packs can run it in
+# worker processes that never set Django up.
+
+
+def render_pdf(symbol, png, days_analyzed, number_of_predictions):
+    pdf_buffer = io.BytesIO()
+    pdf = canvas.Canvas(pdf_buffer, pagesize=letter)
+    pdf.setTitle(f'Performance Report for {symbol}')
+    pdf.drawString(100, 750, f'Performance Report for {symbol}')
+    pdf.drawString(100, 730, 'Key Metrics:')
+    pdf.drawString(120, 710, f'Total Days Analyzed: {days_analyzed}')
+    pdf.drawString(120, 690, f'Number of Predictions: {number_of_predictions}')
+    pdf.drawImage(ImageReader(io.BytesIO(png)), 100, 400, width=400, height=200)
+    pdf.save()
+    return pdf_buffer.getvalue()
+
+
+def render_report(symbol, historical_dates, historical_prices, predicted_dates, predicted_prices, max_points=None):
+    png = render_price_chart(symbol, historical_dates, historical_prices, predicted_dates, predicted_prices, max_points=max_points)
+    pdf = render_pdf(symbol, png, len(historical_dates), len(predicted_dates))
+    return symbol, png, pdf
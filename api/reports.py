@@ -0,0 +1,107 @@
+from collections import namedtuple
+from django.conf import settings
+from .charts import render_price_chart
+from .metrics import chart_render_duration, pdf_render_duration
+from .models import Prediction, StockPrice
+from .price_archive import load_archive, merge_series
+from .price_cache import get_price_series
+from .report_cache import report_cache
+from .report_rendering import render_pdf
+import hashlib
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the chart or PDF layout changes so cached artifacts rendered
+# by the old code stop matching.
+REPORT_TEMPLATE_VERSION = '1'
+
+ReportData = namedtuple('ReportData', ['historical_dates', 'historical_prices', 'predicted_dates', 'predicted_prices'])
+
+
+def load_price_window(symbol, start=None, end=None, limit=None):
+    # Whole histories come from the shared price cache. A window is read
+    # straight from the (symbol, date) index instead, as (date, close) pairs
+    # only, so its cost follows the window rather than the stored history.
+    # Archived years are only consulted when the window reaches past the
+    # rows still in the table.
+    if start is None and end is None and limit is None:
+        series = get_price_series(symbol)
+        return series.dates, series.close
+
+    prices = StockPrice.objects.filter(symbol=symbol)
+    if start:
+        prices = prices.filter(date__gte=start)
+    if end:
+        prices = prices.filter(date__lte=end)
+    if limit:
+        rows = list(prices.order_by('-date').values_list('date', 'close_price')[:limit])[::-1]
+    else:
+        rows = list(prices.order_by('date').values_list('date', 'close_price'))
+
+    dates, closes = zip(*rows) if rows else ((), ())
+    window = (np.array(dates, dtype='datetime64[D]'), np.array(closes, dtype=np.float64))
+    if limit and len(rows) == limit:
+        return window
+
+    archived = load_archive(symbol)
+    if archived is None:
+        return window
+    lower = np.searchsorted(archived[0], np.datetime64(start, 'D')) if start else 0
+    upper = np.searchsorted(archived[0], np.datetime64(end, 'D'), side='right') if end else archived[0].size
+    dates, closes = merge_series((archived[0][lower:upper], archived[4][lower:upper]), window)
+    if limit:
+        dates, closes = dates[-limit:], closes[-limit:]
+    return dates, closes
+
+
+def load_report_data(symbol, start=None, end=None, limit=None):
+    historical_dates, historical_prices = load_price_window(symbol, start, end, limit)
+    if not len(historical_dates):
+        logger.warning(f"No historical data found for {symbol}. Generating partial report with predictions only.")
+
+    # The window only narrows the history; the forecast is always shown.
+    predicted_data = list(Prediction.objects.filter(symbol=symbol).order_by('date').values_list('date', 'predicted_price'))
+    if not predicted_data:
+        raise Prediction.DoesNotExist(f'No prediction data available for {symbol}')
+
+    predicted_dates, predicted_prices = zip(*predicted_data)
+    return ReportData(historical_dates, historical_prices, list(predicted_dates), list(predicted_prices))
+
+
+def chart_max_points():
+    return settings.CHART_MAX_POINTS if settings.CHART_DOWNSAMPLE else None
+
+
+def report_digest(symbol, data):
+    digest = hashlib.sha256()
+    digest.update(f'{REPORT_TEMPLATE_VERSION}:{chart_max_points()}:{symbol}'.encode())
+    digest.update(np.asarray(data.historical_dates, dtype='datetime64[D]').tobytes())
+    digest.update(np.asarray(data.historical_prices, dtype=np.float64).tobytes())
+    digest.update(np.asarray(data.predicted_dates, dtype='datetime64[D]').tobytes())
+    digest.update(np.asarray(data.predicted_prices, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def build_report(symbol, progress=None, data=None, digest=None):
+    progress = progress or (lambda percent: None)
+
+    data = data if data is not None else load_report_data(symbol)
+    digest = digest or report_digest(symbol, data)
+    progress(20)
+
+    cached = report_cache.get(symbol, digest)
+    if cached:
+        progress(90)
+        return cached
+
+    with chart_render_duration.time('chart'):
+        png = render_price_chart(symbol, *data, max_points=chart_max_points())
+    progress(70)
+
+    with pdf_render_duration.time('pdf'):
+        pdf = render_pdf(symbol, png, len(data.historical_dates), len(data.predicted_dates))
+    progress(90)
+
+    return report_cache.put(symbol, digest, png, pdf)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import StockPrice, Item, PredictedStockPrice
+from django.urls import reverse
+from .models import StockPrice, Item, PredictedStockPrice, ReportJob
 
 class ItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,7 +22,76 @@ class BacktestSerializer(serializers.Serializer):
             raise serializers.ValidationError("Short moving average period must be less than the long moving average period.")
         return data
 
+class BacktestBatchSerializer(BacktestSerializer):
+    symbol = None
+    symbols = serializers.ListField(child=serializers.CharField(max_length=10), min_length=1, max_length=5000)
+
+class BacktestGridSerializer(serializers.Serializer):
+    MAX_PAIRS = 5000
+    # About twenty years of trading days.
+    MAX_WINDOW = 5000
+
+    symbol = serializers.CharField(max_length=10)
+    initial_investment = serializers.FloatField(min_value=0.0)
+    short_ma_min = serializers.IntegerField(min_value=1, max_value=MAX_WINDOW)
+    short_ma_max = serializers.IntegerField(min_value=1, max_value=MAX_WINDOW)
+    short_ma_step = serializers.IntegerField(min_value=1, default=1)
+    long_ma_min = serializers.IntegerField(min_value=1, max_value=MAX_WINDOW)
+    long_ma_max = serializers.IntegerField(min_value=1, max_value=MAX_WINDOW)
+    long_ma_step = serializers.IntegerField(min_value=1, default=1)
+
+    def validate(self, data):
+        if data['short_ma_min'] > data['short_ma_max'] or data['long_ma_min'] > data['long_ma_max']:
+            raise serializers.ValidationError("Moving average range minimums must not exceed their maximums.")
+
+        short_values = range(data['short_ma_min'], data['short_ma_max'] + 1, data['short_ma_step'])
+        long_values = range(data['long_ma_min'], data['long_ma_max'] + 1, data['long_ma_step'])
+
+        # Counted without building the pairs: the long windows above a short
+        # one are the tail of their range.
+        pairs = 0
+        for short_ma in short_values:
+            not_above = (short_ma - long_values.start) // long_values.step + 1
+            pairs += len(long_values) - min(max(not_above, 0), len(long_values))
+        if pairs == 0:
+            raise serializers.ValidationError("Short moving average period must be less than the long moving average period for at least one pair.")
+        if pairs > self.MAX_PAIRS:
+            raise serializers.ValidationError(f"A sweep may evaluate at most {self.MAX_PAIRS} moving average pairs.")
+
+        data['short_ma_values'] = list(short_values)
+        data['long_ma_values'] = list(long_values)
+        return data
+
+class PredictBatchSerializer(serializers.Serializer):
+    symbols = serializers.ListField(child=serializers.CharField(max_length=10), min_length=1, max_length=5000)
+
+class ReportWindowSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end')
+        return data
+
+class ReportPackSerializer(serializers.Serializer):
+    symbols = serializers.ListField(child=serializers.CharField(max_length=10), min_length=1, max_length=5000)
+
 class PredictedStockPriceSerializer(serializers.ModelSerializer):
     class Meta:
         model = PredictedStockPrice
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = ['id', 'symbol', 'status', 'progress', 'error', 'created_at', 'updated_at', 'download_url']
+        read_only_fields = ['id', 'status', 'progress', 'error', 'created_at', 'updated_at']
+
+    def get_download_url(self, job):
+        if job.status != ReportJob.SUCCEEDED:
+            return None
+        return reverse('report-job-download', kwargs={'job_id': job.id})
@@ -1,39 +1,139 @@
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from datetime import date, datetime
+import csv
+import io
 import numpy as np
 import os
+import threading
 from sklearn.linear_model import LinearRegression  
 from sklearn import set_config
-from .models import Prediction, StockPrice
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from .metrics import model_inference_duration, upstream_coalesced, upstream_duration, upstream_requests
+from .model_registry import model_registry
+from .models import Prediction, StockPrice, Symbol, SymbolWatermark
+from .prediction_cache import cache_predictions, get_cached_predictions, invalidate_predictions, prediction_keys
+from .price_cache import price_cache
+from .single_flight import SingleFlight
+from .symbol_index import invalidate_symbol_index
 import dill
 
-API_URL = "https://www.alphavantage.co/query"
 API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '../models/linear_regression_model.pkl')
+INGEST_BATCH_SIZE = 1000
+DEFAULT_MODEL = 'linear_regression'
+PREDICTION_WINDOW = 30
+# Calendar days safely inside the 100 trading days of a compact response.
+COMPACT_WINDOW_DAYS = 130
+PREDICTION_UPSERT = {
+    'batch_size': INGEST_BATCH_SIZE,
+    'update_conflicts': True,
+    'unique_fields': ['symbol', 'date'],
+    'update_fields': ['predicted_price'],
+}
 
-def fetch_stock_data(symbol):
-    print(f"Fetching data for {symbol}...")
-    params = {
+model_registry.register(DEFAULT_MODEL, MODEL_PATH)
+
+_session = None
+_session_lock = threading.Lock()
+
+daily_series_fetches = SingleFlight()
+
+
+class UpstreamError(Exception):
+    def __init__(self, message, status_code=None, retryable=False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+def get_session():
+    # One pooled session per process so keep-alive connections to the
+    # upstream API are reused across requests and fetch threads.
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.FETCH_MAX_WORKERS)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+def upstream_get(params):
+    with upstream_duration.time('upstream', function=params['function']):
+        try:
+            response = get_session().get(settings.ALPHA_VANTAGE_API_URL, params=params, timeout=settings.UPSTREAM_TIMEOUT)
+        except requests.RequestException:
+            upstream_requests.inc(function=params['function'], status='error')
+            raise
+    upstream_requests.inc(function=params['function'], status=response.status_code)
+    return response
+
+def daily_series_params(symbol, outputsize):
+    return {
         'function': 'TIME_SERIES_DAILY',
         'symbol': symbol,
         'apikey': API_KEY,
-        'outputsize': 'compact'
+        'outputsize': outputsize
     }
-    response = requests.get(API_URL, params=params)
-    print(f"Status Code: {response.status_code}")
 
+def check_daily_response(symbol, response):
+    # Shared by the requests and httpx clients, whose responses both have
+    # status_code, text and json().
     if response.status_code != 200:
-        raise Exception(f"Failed to fetch data: {response.text}")
+        raise UpstreamError(f"Failed to fetch data: {response.text}", response.status_code,
+                            retryable=response.status_code == 429 or response.status_code >= 500)
 
     response_json = response.json()
-    print("API Response:", response_json)
+    # Alpha Vantage reports throttling with a 200 and a 'Note' or
+    # 'Information' message instead of the time series.
+    if 'Time Series (Daily)' not in response_json and ('Note' in response_json or 'Information' in response_json):
+        message = response_json.get('Note') or response_json.get('Information')
+        raise UpstreamError(f"Upstream rate limit reached: {message}", response.status_code, retryable=True)
 
     data = response_json.get('Time Series (Daily)', {})
     if not data:
         print(f"No data found for {symbol}")
         raise ValueError(f"No data found for the symbol: {symbol}")
 
-    store_stock_data(symbol)
+    return data
+
+def request_daily_series(symbol, outputsize='compact'):
+    # Callers asking for the same series at the same time (or within
+    # UPSTREAM_COALESCE_TTL of each other) share one upstream request.
+    data, outcome = daily_series_fetches.do((symbol, outputsize), lambda: _request_daily_series(symbol, outputsize))
+    if outcome != 'called':
+        upstream_coalesced.inc(function='TIME_SERIES_DAILY', outcome=outcome)
+    return data
+
+def _request_daily_series(symbol, outputsize):
+    print(f"Fetching data for {symbol}...")
+    response = upstream_get(daily_series_params(symbol, outputsize))
+    print(f"Status Code: {response.status_code}")
+    return check_daily_response(symbol, response)
+
+def plan_fetch(watermark, force=False):
+    # None when the symbol was already refreshed today, 'full' for a symbol
+    # we have never stored or whose newest bar is older than what a compact
+    # response covers, and 'compact' (the last 100 days) otherwise.
+    if watermark is None or watermark.latest_date is None:
+        return 'full'
+    if not force and watermark.last_fetched_at and timezone.localdate(watermark.last_fetched_at) >= timezone.localdate():
+        return None
+    if (timezone.localdate() - watermark.latest_date).days > COMPACT_WINDOW_DAYS:
+        return 'full'
+    return 'compact'
+
+def fetch_stock_data(symbol, outputsize=None):
+    watermark = SymbolWatermark.objects.filter(symbol=symbol).first()
+    data = request_daily_series(symbol, outputsize or plan_fetch(watermark, force=True))
+    store_stock_data(symbol, data, since=watermark.latest_date if watermark else None)
     return data
 
 def load_model():
@@ -41,11 +141,7 @@ def load_model():
         if not os.path.exists(MODEL_PATH):
             raise FileNotFoundError(f"Model file not found at: {MODEL_PATH}")
 
-        with open(MODEL_PATH, 'rb') as f:
-            model = dill.load(f)
-
-        print(f"Model loaded successfully from {MODEL_PATH}")
-        return model
+        return model_registry.get(DEFAULT_MODEL)
 
     except ModuleNotFoundError as e:
         print(f"Compatibility issue: {str(e)}")
@@ -82,29 +178,24 @@ def ensure_model_exists():
         print("Model not found. Training a new model...")
         train_model('AAPL') 
 
+def refresh_stock_data(symbol):
+    # Goes upstream only when the symbol has not been refreshed today.
+    watermark = SymbolWatermark.objects.filter(symbol=symbol).first()
+    outputsize = plan_fetch(watermark)
+    if outputsize is not None:
+        data = request_daily_series(symbol, outputsize)
+        store_stock_data(symbol, data, since=watermark.latest_date if watermark else None)
+
 def predict_stock(symbol):
     try:
-        stock_data = fetch_stock_data(symbol)
-        prices = [float(data['4. close']) for date, data in sorted(stock_data.items())]
-        if len(prices) < 30:
-            raise ValueError("Not enough data to make a prediction.")
+        refresh_stock_data(symbol)
 
-        input_data = np.array(prices[-30:]).reshape(1, -1)
-        print(f"Input data for prediction: {input_data}")
+        predictions, errors = predict_batch([symbol])
+        if symbol in errors:
+            raise ValueError(errors[symbol])
 
-        ensure_model_exists()
-        model = load_model()
-
-        prediction = model.predict(input_data)[0]
+        prediction = predictions[symbol]
         print(f"Prediction: {prediction}")
-
-        Prediction.objects.create(
-            symbol=symbol,
-            predicted_price=prediction,
-            date=datetime.now().date()
-        )
-
-        print("Prediction saved successfully.")
         return prediction
 
     except ValueError as ve:
@@ -119,30 +210,173 @@ def predict_stock(symbol):
         print(f"Unexpected error: {str(e)}")
         raise Exception(f"Error during prediction: {str(e)}")
 
-def store_stock_data(symbol):
-    print(f"Fetching and storing data for {symbol}...")
+def prediction_window_rows(symbols):
+    # The last PREDICTION_WINDOW closes of every symbol in a single query.
+    return (
+        StockPrice.objects.filter(symbol__in=symbols)
+        .annotate(recency=Window(RowNumber(), partition_by=F('symbol'), order_by=F('date').desc()))
+        .filter(recency__lte=PREDICTION_WINDOW)
+        .order_by('symbol', 'date')
+        .values_list('symbol', 'date', 'close_price')
+    )
+
+def group_prediction_windows(rows):
+    # {symbol: (date of the newest bar, closes)}
+    windows = {}
+    for symbol, date_, close in rows:
+        dates, closes = windows.setdefault(symbol, ([], []))
+        dates.append(date_)
+        closes.append(close)
+    return {symbol: (dates[-1], np.array(closes, dtype=np.float64)) for symbol, (dates, closes) in windows.items()}
+
+def load_prediction_windows(symbols):
+    return group_prediction_windows(prediction_window_rows(symbols))
+
+def check_prediction_windows(symbols, windows):
+    errors = {}
+    ready = []
+    for symbol in symbols:
+        if symbol not in windows:
+            errors[symbol] = f"No stored price data for {symbol}."
+        elif windows[symbol][1].size < PREDICTION_WINDOW:
+            errors[symbol] = "Not enough data to make a prediction."
+        else:
+            ready.append(symbol)
+    return ready, errors
+
+def predict_windows(windows, symbols):
+    # Returns (cached predictions, fresh predictions, cache keys); the fresh
+    # ones still have to be stored and cached by the caller.
+    ensure_model_exists()
+    model = load_model()
+    model_version = model_registry.get_loaded(DEFAULT_MODEL).version
+
+    keys = prediction_keys({symbol: windows[symbol][0] for symbol in symbols}, model_version)
+    predictions = get_cached_predictions(keys)
+    missing = [symbol for symbol in symbols if symbol not in predictions]
+
+    fresh = {}
+    if missing:
+        # One predict over the stacked windows instead of one call per symbol.
+        with model_inference_duration.time('inference', model=DEFAULT_MODEL):
+            values = np.ravel(model.predict(np.vstack([windows[symbol][1] for symbol in missing])))
+        fresh = {symbol: float(value) for symbol, value in zip(missing, values)}
+    return predictions, fresh, keys
+
+def prediction_rows(predictions):
+    today = datetime.now().date()
+    return [Prediction(symbol=symbol, predicted_price=value, date=today) for symbol, value in predictions.items()]
+
+def predict_batch(symbols):
+    symbols = list(dict.fromkeys(symbols))
+    windows = load_prediction_windows(symbols)
+    ready, errors = check_prediction_windows(symbols, windows)
+    if not ready:
+        return {}, errors
+
+    predictions, fresh, keys = predict_windows(windows, ready)
+    if fresh:
+        Prediction.objects.bulk_create(prediction_rows(fresh), **PREDICTION_UPSERT)
+        cache_predictions(keys, fresh)
+        predictions.update(fresh)
+
+    return {symbol: predictions[symbol] for symbol in ready}, errors
+
+def parse_daily_series(symbol, stock_data):
+    return [
+        StockPrice(
+            symbol=symbol,
+            date=date.fromisoformat(date_str),
+            open_price=float(daily_data['1. open']),
+            high_price=float(daily_data['2. high']),
+            low_price=float(daily_data['3. low']),
+            close_price=float(daily_data['4. close']),
+            volume=int(daily_data['5. volume'])
+        )
+        for date_str, daily_data in stock_data.items()
+    ]
+
+def store_stock_data(symbol, stock_data, since=None):
+    print(f"Storing data for {symbol}...")
 
     try:
-        stock_data = fetch_stock_data(symbol) 
-
-        for date_str, daily_data in stock_data.items():
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            print(f"Storing data for {date}...")
-
-            StockPrice.objects.update_or_create(
-                symbol=symbol,
-                date=date,
-                defaults={
-                    'open_price': float(daily_data['1. open']),
-                    'high_price': float(daily_data['2. high']),
-                    'low_price': float(daily_data['3. low']),
-                    'close_price': float(daily_data['4. close']),
-                    'volume': int(daily_data['5. volume'])
-                }
+        rows = parse_daily_series(symbol, stock_data)
+        if since is not None:
+            rows = [row for row in rows if row.date > since]
+
+        # One upsert per batch instead of a SELECT plus INSERT/UPDATE per day.
+        with transaction.atomic():
+            if rows:
+                StockPrice.objects.bulk_create(
+                    rows,
+                    batch_size=INGEST_BATCH_SIZE,
+                    update_conflicts=True,
+                    unique_fields=['symbol', 'date'],
+                    update_fields=['open_price', 'high_price', 'low_price', 'close_price', 'volume']
+                )
+            latest_date = max([row.date for row in rows] + ([since] if since else []), default=None)
+            SymbolWatermark.objects.bulk_create(
+                [SymbolWatermark(symbol=symbol, latest_date=latest_date, last_fetched_at=timezone.now())],
+                update_conflicts=True,
+                unique_fields=['symbol'],
+                update_fields=['latest_date', 'last_fetched_at']
             )
 
-        print(f"Successfully fetched and stored data for {symbol}")
+        price_cache.invalidate(symbol)
+        invalidate_predictions(symbol)
+        print(f"Successfully stored {len(rows)} rows for {symbol}")
+        return len(rows)
 
     except Exception as e:
-        print(f"Error fetching or storing data for {symbol}: {str(e)}")
-        raise
\ No newline at end of file
+        print(f"Error storing data for {symbol}: {str(e)}")
+        raise
+
+
+def request_listing():
+    print("Fetching symbol listing...")
+    params = {'function': 'LISTING_STATUS', 'apikey': API_KEY}
+    response = upstream_get(params)
+    print(f"Status Code: {response.status_code}")
+
+    if response.status_code != 200:
+        raise UpstreamError(f"Failed to fetch listing: {response.text}", response.status_code,
+                            retryable=response.status_code == 429 or response.status_code >= 500)
+    return response.text
+
+
+def parse_listing(text):
+    rows = []
+    for row in csv.DictReader(io.StringIO(text)):
+        if not row.get('symbol'):
+            continue
+        ipo_date = row.get('ipoDate')
+        rows.append(Symbol(
+            symbol=row['symbol'],
+            name=row.get('name') or '',
+            exchange=row.get('exchange') or '',
+            asset_type=row.get('assetType') or '',
+            ipo_date=date.fromisoformat(ipo_date) if ipo_date and ipo_date != 'null' else None,
+        ))
+    return rows
+
+
+def store_symbols(rows):
+    # The listing is the full set of active symbols, so anything it did not
+    # touch has been delisted and is dropped.
+    if not rows:
+        raise ValueError("Listing contained no symbols")
+
+    started = timezone.now()
+    with transaction.atomic():
+        Symbol.objects.bulk_create(
+            rows,
+            batch_size=INGEST_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['symbol'],
+            update_fields=['name', 'exchange', 'asset_type', 'ipo_date', 'updated_at']
+        )
+        removed, _ = Symbol.objects.filter(updated_at__lt=started).delete()
+
+    invalidate_symbol_index()
+    print(f"Stored {len(rows)} symbols, removed {removed}")
+    return len(rows), removed
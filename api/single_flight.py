@@ -0,0 +1,162 @@
+from django.conf import settings
+import asyncio
+import copy
+import threading
+import time
+
+# Collapses concurrent calls for the same key into one: the first caller runs
+# the function and everyone who asks for that key meanwhile waits for it and
+# gets its result (or a copy of its exception). A successful result is also
+# handed out for `ttl` seconds afterwards, which covers the callers that
+# arrive just after the call finished. A call that is cancelled rather than
+# failing is not shared: its waiters make the call again themselves, one of
+# them leading it. Threads and coroutines share the same
+# in-flight calls, so a sync fetch can answer an async caller and the other
+# way round; only callers within one process are coalesced.
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error', 'abandoned', 'futures')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.abandoned = False
+        # (loop, future) of every coroutine waiting on this call.
+        self.futures = []
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SingleFlight:
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._results = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.reused = 0
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else settings.UPSTREAM_COALESCE_TTL
+
+    def _join(self, key, loop=None):
+        # (result, call, whether this caller runs it, future): result is set
+        # when a recent one can be reused. A coroutine following a call gets
+        # a future that is resolved on its loop when the call ends.
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None and result[0] > time.monotonic():
+                self.reused += 1
+                return result, None, False, None
+
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                return None, call, True, None
+
+            self.coalesced += 1
+            future = None
+            if loop is not None:
+                future = loop.create_future()
+                call.futures.append((loop, future))
+            return None, call, False, future
+
+    def _finish(self, key, call):
+        with self._lock:
+            del self._calls[key]
+            now = time.monotonic()
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            if call.error is None and not call.abandoned and self.ttl > 0:
+                self._results[key] = (now + self.ttl, call.value)
+            call.done.set()
+            futures, call.futures = call.futures, []
+        for loop, future in futures:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def _shared(self, call):
+        # Every waiter raises its own copy, so attributes set on the exception
+        # while handling it (e.g. the retry count) never leak between them.
+        if call.error is not None:
+            raise _copy_error(call.error)
+        return call.value, 'coalesced'
+
+    def do(self, key, function):
+        # Returns (result, how it was obtained): 'called', 'coalesced' or
+        # 'reused'.
+        while True:
+            result, call, leader, _ = self._join(key)
+            if result is not None:
+                return result[1], 'reused'
+            if leader:
+                break
+            call.done.wait()
+            if not call.abandoned:
+                return self._shared(call)
+
+        try:
+            call.value = function()
+        except Exception as e:
+            # Kept as a copy taken before the caller's handlers touch it.
+            call.error = _copy_error(e)
+            raise
+        except BaseException:
+            call.abandoned = True
+            raise
+        finally:
+            self._finish(key, call)
+        return call.value, 'called'
+
+    async def ado(self, key, function):
+        # do() for coroutines: `function` returns an awaitable.
+        loop = asyncio.get_running_loop()
+        while True:
+            result, call, leader, future = self._join(key, loop)
+            if result is not None:
+                return result[1], 'reused'
+            if leader:
+                break
+            await future
+            if not call.abandoned:
+                return self._shared(call)
+
+        try:
+            call.value = await function()
+        except Exception as e:
+            # Kept as a copy taken before the caller's handlers touch it.
+            call.error = _copy_error(e)
+            raise
+        except BaseException:
+            # Cancelled, e.g. because the client of the leading request went
+            # away; that is no reason to fail the others.
+            call.abandoned = True
+            raise
+        finally:
+            self._finish(key, call)
+        return call.value, 'called'
+
+    def forget(self, key=None):
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'reused': self.reused, 'in_flight': len(self._calls)}
+
+
+def _copy_error(error):
+    try:
+        copied = copy.copy(error)
+    except Exception:
+        return error
+    return copied.with_traceback(error.__traceback__)
@@ -0,0 +1,79 @@
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+import io
+import os
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    # Only single ranges are honoured; anything else, including a range that
+    # ends before it starts, falls back to the whole file, which RFC 9110
+    # allows. Returns (start, end) inclusive, None for "send everything", or
+    # False when the range cannot be satisfied.
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def open_content(content):
+    # File contents can be given as a path or, when already in memory, as bytes.
+    return io.BytesIO(content) if isinstance(content, bytes) else open(content, 'rb')
+
+
+def read_range(content, start, end):
+    with open_content(content) as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request, content, content_type, filename, as_attachment=False, etag=None):
+    size = len(content) if isinstance(content, bytes) else os.path.getsize(content)
+    requested = parse_range(request.headers.get('Range'), size)
+
+    # A stale If-Range means the client's partial copy is of another version,
+    # so the Range header is ignored, even one that cannot be satisfied.
+    if_range = request.headers.get('If-Range')
+    if requested is not None and if_range and if_range != etag:
+        requested = None
+
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif requested:
+        start, end = requested
+        response = StreamingHttpResponse(read_range(content, start, end), status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    else:
+        response = FileResponse(open_content(content), as_attachment=as_attachment, filename=filename, content_type=content_type)
+        response.block_size = CHUNK_SIZE
+
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    return response
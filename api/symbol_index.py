@@ -0,0 +1,131 @@
+from asgiref.sync import sync_to_async
+from bisect import bisect_left
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Max
+from .models import Symbol
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# The whole symbol directory is held in memory as two sorted key lists, one
+# by ticker and one by company name, so a prefix lookup is a binary search
+# plus a short scan. Each process compares the table's version (row count
+# and latest updated_at) with the one its index was built from, at most once
+# every SYMBOL_INDEX_CHECK_INTERVAL seconds, so a refresh run by another
+# process reaches every worker without a shared cache.
+
+
+def invalidate_symbol_index():
+    # Has this process check the table on its next lookup.
+    symbol_index.expire()
+
+
+def current_generation():
+    version = Symbol.objects.aggregate(rows=Count('id'), updated=Max('updated_at'))
+    return version['rows'], version['updated']
+
+
+def prefix_range(keys, prefix):
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + '\uffff', lo=start)
+    return start, end
+
+
+class SymbolIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked_at = None
+        # (entries, symbol keys, name keys, entry index of each name key),
+        # swapped in as one tuple so readers never see half a rebuild.
+        self._index = ([], [], [], [])
+
+    def build(self, rows=None):
+        if rows is None:
+            rows = Symbol.objects.values_list('symbol', 'name', 'exchange')
+        rows = sorted(rows, key=lambda row: row[0].upper())
+        by_name = sorted((name.lower(), index) for index, (_, name, _) in enumerate(rows) if name)
+        self._index = (
+            [{'symbol': symbol, 'name': name, 'exchange': exchange} for symbol, name, exchange in rows],
+            [symbol.upper() for symbol, _, _ in rows],
+            [name for name, _ in by_name],
+            [index for _, index in by_name],
+        )
+
+    def expire(self):
+        self._checked_at = None
+
+    def _due(self):
+        return self._checked_at is None or time.monotonic() - self._checked_at >= settings.SYMBOL_INDEX_CHECK_INTERVAL
+
+    def refresh(self):
+        if not self._due():
+            return
+        generation = current_generation()
+        if generation != self._generation:
+            with self._lock:
+                if generation != self._generation:
+                    self.build()
+                    self._generation = generation
+        self._checked_at = time.monotonic()
+
+    async def arefresh(self):
+        # Concurrent rebuilds on one event loop are harmless, as each swaps in
+        # a complete index, so no lock is taken here.
+        if not self._due():
+            return
+        generation = await sync_to_async(current_generation)()
+        if generation != self._generation:
+            self.build([row async for row in Symbol.objects.values_list('symbol', 'name', 'exchange')])
+            self._generation = generation
+        self._checked_at = time.monotonic()
+
+    def search(self, query, limit=10):
+        self.refresh()
+        return self.lookup(query, limit)
+
+    async def asearch(self, query, limit=10):
+        await self.arefresh()
+        return self.lookup(query, limit)
+
+    def lookup(self, query, limit=10):
+        query = query.strip()
+        if not query:
+            return []
+
+        entries, symbol_keys, name_keys, name_entries = self._index
+        # Ticker matches come first, then company names that start with the
+        # query, without repeating a symbol.
+        start, end = prefix_range(symbol_keys, query.upper())
+        matches = list(range(start, min(end, start + limit)))
+        if len(matches) < limit:
+            seen = set(matches)
+            start, end = prefix_range(name_keys, query.lower())
+            for position in range(start, end):
+                index = name_entries[position]
+                if index not in seen:
+                    matches.append(index)
+                    seen.add(index)
+                    if len(matches) == limit:
+                        break
+        return [entries[index] for index in matches]
+
+    def __len__(self):
+        return len(self._index[0])
+
+
+symbol_index = SymbolIndex()
+
+
+def warm_up_symbol_index():
+    # Called by the WSGI/ASGI entry points once the apps are loaded, so the
+    # first search after a deploy does not pay for the build.
+    if not settings.SYMBOL_INDEX_WARMUP:
+        return
+    try:
+        symbol_index.refresh()
+    except DatabaseError as e:
+        logger.warning(f"Symbol index not built at startup: {e}")
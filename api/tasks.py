@@ -0,0 +1,46 @@
+from celery import shared_task
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import ReportJob
+from .reports import build_report
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def update_job(job_id, **fields):
+    # QuerySet.update() skips auto_now, and updated_at is the job's heartbeat.
+    ReportJob.objects.filter(pk=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def expire_stale_jobs():
+    # Running jobs whose worker died never finish on their own; fail them
+    # once they have gone REPORT_JOBS_STALE_AFTER seconds without progress.
+    cutoff = timezone.now() - timedelta(seconds=settings.REPORT_JOBS_STALE_AFTER)
+    return ReportJob.objects.filter(status=ReportJob.RUNNING, updated_at__lt=cutoff).update(
+        status=ReportJob.FAILED, error='Worker stopped reporting progress', updated_at=timezone.now())
+
+
+@shared_task(name='api.generate_report')
+def generate_report(job_id):
+    job = ReportJob.objects.get(pk=job_id)
+    update_job(job_id, status=ReportJob.RUNNING, progress=5)
+
+    def progress(percent):
+        update_job(job_id, progress=percent)
+
+    try:
+        report = build_report(job.symbol, progress)
+
+        os.makedirs(settings.REPORTS_DIR, exist_ok=True)
+        pdf_path = os.path.join(settings.REPORTS_DIR, f'{job_id}.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(report.pdf)
+
+        update_job(job_id, status=ReportJob.SUCCEEDED, progress=100, pdf_path=pdf_path)
+
+    except Exception as e:
+        logger.exception(f"Report job {job_id} for {job.symbol} failed: {e}")
+        update_job(job_id, status=ReportJob.FAILED, error=str(e))
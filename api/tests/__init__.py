@@ -1 +1,23 @@
-from .test_backtest import BacktestTestCase
\ No newline at end of file
+from .test_async_views import AsyncViewsTestCase
+from .test_backtest import BacktestTestCase, BacktestEngineTestCase
+from .test_backtest_batch import BacktestBatchTestCase
+from .test_backtest_grid import BacktestGridTestCase
+from .test_benchmarks import BenchmarkSuiteTestCase
+from .test_charts import ChartRenderingTestCase
+from .test_downsampling import DownsamplingTestCase
+from .test_fetcher import FetchManyTestCase, TokenBucketTestCase
+from .test_indexes import StockPriceIndexTestCase
+from .test_ingestion import StoreStockDataTestCase
+from .test_metrics import MetricsTestCase
+from .test_model_registry import ModelRegistryTestCase, ModelStatusViewTestCase
+from .test_predict_batch import PredictBatchTestCase
+from .test_price_archive import PriceArchiveTestCase
+from .test_price_cache import PriceCacheTestCase
+from .test_profiling import ProfilingTestCase
+from .test_report_cache import ReportCacheTestCase
+from .test_report_data import ReportDataTestCase
+from .test_report_delivery import ReportDeliveryTestCase
+from .test_report_jobs import ReportJobTestCase
+from .test_report_pack import ReportPackTestCase
+from .test_single_flight import SingleFlightTestCase
+from .test_symbols import SymbolDirectoryTestCase
\ No newline at end of file
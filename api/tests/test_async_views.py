@@ -0,0 +1,118 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
+from api import async_services
+from api.models import Prediction, StockPrice, Symbol, SymbolWatermark
+from api.services import daily_series_fetches, predict_batch
+from api.symbol_index import invalidate_symbol_index, symbol_index
+from api.tests.test_ingestion import daily_payload
+from datetime import date, timedelta
+import asyncio
+import httpx
+
+
+class FakeAsyncClient:
+    # Answers TIME_SERIES_DAILY after `delay` seconds, with the `statuses` it
+    # is given first, and records how many requests were waiting at the same
+    # time.
+    def __init__(self, payload, delay=0.0, statuses=()):
+        self.payload = payload
+        self.delay = delay
+        self.statuses = list(statuses)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def get(self, url, params=None):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.statuses:
+            return httpx.Response(self.statuses.pop(0), text='Service Unavailable')
+        return httpx.Response(200, json={'Time Series (Daily)': self.payload})
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        daily_series_fetches.forget()
+        for offset in range(40):
+            close = 150 + offset % 7
+            StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+        SymbolWatermark.objects.create(symbol='AAPL', latest_date=date(2023, 2, 9), last_fetched_at=timezone.now())
+
+    async def test_prediction_matches_the_sync_path(self):
+        with mock.patch('api.async_services.get_async_client') as get_client:
+            response = await self.async_client.post(reverse('async-predict'), {'symbol': 'AAPL'}, content_type='application/json')
+        get_client.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['symbol'], 'AAPL')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries".*inference;dur=')
+        self.assertEqual(await Prediction.objects.filter(symbol='AAPL').acount(), 1)
+
+    async def test_stale_symbol_is_refreshed_through_the_async_client(self):
+        await SymbolWatermark.objects.filter(symbol='AAPL').aupdate(last_fetched_at=timezone.now() - timedelta(days=1))
+        upstream = FakeAsyncClient(daily_payload(5, start=date(2023, 2, 10)))
+        with mock.patch('api.async_services.get_async_client', return_value=upstream):
+            response = await self.async_client.post(reverse('async-predict'), {'symbol': 'AAPL'}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(upstream.requests, 1)
+        self.assertEqual(await StockPrice.objects.filter(symbol='AAPL').acount(), 45)
+
+    async def test_concurrent_predictions_share_one_upstream_request(self):
+        await SymbolWatermark.objects.filter(symbol='AAPL').aupdate(last_fetched_at=timezone.now() - timedelta(days=1))
+        upstream = FakeAsyncClient(daily_payload(5, start=date(2023, 2, 10)), delay=0.2)
+        with mock.patch('api.async_services.get_async_client', return_value=upstream):
+            results = await asyncio.gather(*(async_services.apredict_stock('AAPL') for _ in range(20)))
+
+        self.assertEqual(upstream.requests, 1)
+        self.assertEqual(len(set(results)), 1)
+
+    async def test_upstream_fetches_are_rate_limited_and_retried(self):
+        await SymbolWatermark.objects.filter(symbol='AAPL').aupdate(last_fetched_at=timezone.now() - timedelta(days=1))
+        upstream = FakeAsyncClient(daily_payload(5, start=date(2023, 2, 10)), statuses=[503])
+        bucket = mock.Mock(aacquire=mock.AsyncMock())
+        with mock.patch('api.async_services.get_async_client', return_value=upstream):
+            with mock.patch('api.async_services.get_upstream_bucket', return_value=bucket), mock.patch('api.async_services.retry_delay', return_value=0):
+                await async_services.apredict_stock('AAPL')
+
+        self.assertEqual(upstream.requests, 2)
+        self.assertEqual(bucket.aacquire.await_count, 2)
+        self.assertEqual(await StockPrice.objects.filter(symbol='AAPL').acount(), 45)
+
+    async def test_invalid_requests(self):
+        response = await self.async_client.post(reverse('async-predict'), {}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post(reverse('async-predict'), '[1]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        with mock.patch('api.async_services.get_async_client', return_value=FakeAsyncClient({})):
+            response = await self.async_client.post(reverse('async-predict'), {'symbol': 'NFLX'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('No data found', response.json()['error'])
+
+    async def test_symbol_search_matches_the_sync_view(self):
+        await Symbol.objects.abulk_create([Symbol(symbol='AAPL', name='Apple Inc'), Symbol(symbol='AMZN', name='Amazon.com Inc')])
+        invalidate_symbol_index()
+
+        response = await self.async_client.get(reverse('async-symbol-search'), {'q': 'a'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['symbol'] for result in response.json()['results']], ['AAPL', 'AMZN'])
+        self.assertEqual(response.json()['results'], symbol_index.lookup('a'))
+        response = await self.async_client.get(reverse('async-symbol-search'), {'q': 'a', 'limit': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_and_sync_batches_agree(self):
+        expected, _ = predict_batch(['AAPL'])
+        cache.clear()
+        predictions, errors = async_to_sync(async_services.apredict_batch)(['AAPL', 'NFLX'])
+        self.assertEqual(predictions, expected)
+        self.assertEqual(list(errors), ['NFLX'])
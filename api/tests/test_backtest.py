@@ -1,9 +1,12 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from api.backtest_engine import moving_average, simulate_crossover
 from api.models import StockPrice
 from datetime import date
+import numpy as np
+import pandas as pd
 
 
 class BacktestTestCase(TestCase):
@@ -105,4 +108,69 @@ class BacktestTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('total_return', response.data)
         self.assertIn('max_drawdown', response.data)
-        self.assertIn('number_of_trades', response.data)
\ No newline at end of file
+        self.assertIn('number_of_trades', response.data)
+
+def reference_backtest(prices, short_ma, long_ma, initial_investment):
+    data = pd.DataFrame({'close_price': prices})
+    data['short_ma'] = data['close_price'].rolling(window=short_ma).mean()
+    data['long_ma'] = data['close_price'].rolling(window=long_ma).mean()
+
+    position = 0
+    cash = initial_investment
+    trades = 0
+    max_drawdown = 0
+    peak = 0
+
+    for i in range(len(data)):
+        if pd.isna(data['short_ma'].iloc[i]) or pd.isna(data['long_ma'].iloc[i]):
+            continue
+
+        if position == 0 and data['short_ma'].iloc[i] > data['long_ma'].iloc[i]:
+            position = cash / data['close_price'].iloc[i]
+            cash = 0
+            trades += 1
+
+        elif position > 0 and data['short_ma'].iloc[i] < data['long_ma'].iloc[i]:
+            cash = position * data['close_price'].iloc[i]
+            position = 0
+            trades += 1
+
+        investment_value = position * data['close_price'].iloc[i] if position > 0 else cash
+        peak = max(peak, investment_value)
+        max_drawdown = max(max_drawdown, (peak - investment_value) / peak if peak > 0 else 0)
+
+    if position > 0:
+        cash = position * data['close_price'].iloc[-1]
+    total_return = (cash - initial_investment) / initial_investment * 100
+
+    return {
+        "total_return": total_return,
+        "max_drawdown": max_drawdown * 100,
+        "number_of_trades": trades
+    }
+
+
+class BacktestEngineTestCase(SimpleTestCase):
+    def assertMatchesReference(self, prices, short_ma, long_ma, initial_investment=10000.0):
+        expected = reference_backtest(prices, short_ma, long_ma, initial_investment)
+        result = simulate_crossover(prices, moving_average(prices, short_ma), moving_average(prices, long_ma), initial_investment)
+        self.assertEqual(result, expected)
+
+    def test_matches_reference_loop_on_random_walks(self):
+        rng = np.random.default_rng(7)
+        for _ in range(20):
+            prices = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 500))), 2)
+            short_ma = int(rng.integers(1, 20))
+            long_ma = int(rng.integers(short_ma + 1, 60))
+            self.assertMatchesReference(prices, short_ma, long_ma)
+
+    def test_matches_reference_loop_with_flat_prices(self):
+        prices = np.array([10.0] * 10 + [11.0, 12.0, 12.0, 11.0, 10.0, 10.0, 10.0, 12.0])
+        self.assertMatchesReference(prices, 2, 4)
+
+    def test_open_position_is_closed_at_last_price(self):
+        prices = np.arange(1.0, 21.0)
+        result = simulate_crossover(prices, moving_average(prices, 2), moving_average(prices, 4), 1000.0)
+        self.assertEqual(result['number_of_trades'], 1)
+        self.assertAlmostEqual(result['total_return'], (20.0 / 4.0 - 1) * 100)
+        self.assertEqual(result['max_drawdown'], 0)
@@ -0,0 +1,76 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.backtest import run_backtest, run_portfolio_backtest
+from api.backtest_engine import backtest_series
+from api.models import StockPrice
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+
+class BacktestBatchTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        series = {
+            'AAPL': [100, 102, 101, 105, 107, 106, 104, 103, 108, 110],
+            'MSFT': [200, 198, 202, 205, 203, 207, 210, 208, 206, 211],
+            'TSLA': [300, 305],
+        }
+        for symbol, closes in series.items():
+            for offset, close in enumerate(closes):
+                StockPrice.objects.create(symbol=symbol, date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+
+        self.valid_payload = {
+            "symbols": ["AAPL", "MSFT", "TSLA", "NFLX"],
+            "initial_investment": 10000,
+            "short_ma": 2,
+            "long_ma": 4
+        }
+
+    def test_portfolio_reports_per_symbol_results_and_failures(self):
+        result = run_portfolio_backtest(['AAPL', 'MSFT', 'TSLA', 'NFLX'], 9000.0, 2, 4, max_workers=2)
+        self.assertEqual(sorted(result['results']), ['AAPL', 'MSFT'])
+        self.assertEqual(sorted(result['failures']), ['NFLX', 'TSLA'])
+        for symbol in ('AAPL', 'MSFT'):
+            expected = run_backtest(symbol, 4500.0, 2, 4)
+            self.assertAlmostEqual(result['results'][symbol]['total_return'], expected['total_return'])
+        self.assertEqual(result['portfolio']['invested'], 9000.0)
+
+    def test_failed_backtests_leave_their_allocation_in_cash(self):
+        def flaky(symbol, *args):
+            if symbol == 'MSFT':
+                raise ValueError('Simulation failed')
+            return backtest_series(symbol, *args)
+
+        with mock.patch('api.backtest.backtest_series', side_effect=flaky):
+            result = run_portfolio_backtest(['AAPL', 'MSFT'], 10000.0, 2, 4, max_workers=1)
+        self.assertEqual(result['failures'], {'MSFT': 'Simulation failed'})
+        self.assertEqual(result['portfolio']['cash'], 5000.0)
+        expected = run_backtest('AAPL', 5000.0, 2, 4)
+        self.assertAlmostEqual(result['portfolio']['total_return'], expected['total_return'] / 2)
+
+    def test_portfolio_return_is_capital_weighted(self):
+        result = run_portfolio_backtest(['AAPL', 'MSFT'], 10000.0, 2, 4, max_workers=1)
+        returns = [summary['total_return'] for summary in result['results'].values()]
+        self.assertAlmostEqual(result['portfolio']['total_return'], sum(returns) / len(returns))
+        self.assertEqual(result['portfolio']['symbols'], 2)
+
+    def test_batch_endpoint(self):
+        response = self.client.post(reverse('backtest-batch'), data=self.valid_payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('total_return', response.data['portfolio'])
+        self.assertIn('NFLX', response.data['failures'])
+
+    def test_batch_endpoint_without_data(self):
+        payload = self.valid_payload.copy()
+        payload['symbols'] = ['NFLX']
+        response = self.client.post(reverse('backtest-batch'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_management_command(self):
+        stdout = StringIO()
+        call_command('backtest_portfolio', 'AAPL', 'MSFT', short_ma=2, long_ma=4, workers=1, stdout=stdout, stderr=StringIO())
+        self.assertIn('Portfolio of 2 symbols', stdout.getvalue())
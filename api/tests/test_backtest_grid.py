@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.backtest import run_backtest, run_backtest_grid
+from api.models import StockPrice
+from datetime import date, timedelta
+import time
+
+
+class BacktestGridTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        closes = [100, 102, 101, 105, 107, 106, 104, 103, 108, 110, 109, 112, 111, 108, 106, 107, 111, 113, 115, 114]
+        for offset, close in enumerate(closes):
+            StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+
+        self.valid_payload = {
+            "symbol": "AAPL",
+            "initial_investment": 10000,
+            "short_ma_min": 1,
+            "short_ma_max": 4,
+            "long_ma_min": 3,
+            "long_ma_max": 8
+        }
+
+    def test_grid_matches_single_backtests(self):
+        results = run_backtest_grid('AAPL', 10000.0, range(1, 5), range(3, 9))
+        self.assertEqual(len(results), sum(1 for s in range(1, 5) for l in range(3, 9) if s < l))
+        for result in results:
+            expected = run_backtest('AAPL', 10000.0, result['short_ma'], result['long_ma'])
+            self.assertEqual({key: result[key] for key in expected}, expected)
+
+    def test_grid_results_are_ranked_by_return(self):
+        results = run_backtest_grid('AAPL', 10000.0, range(1, 5), range(3, 9))
+        returns = [result['total_return'] for result in results]
+        self.assertEqual(returns, sorted(returns, reverse=True))
+
+    def test_grid_endpoint(self):
+        response = self.client.post(reverse('backtest-grid'), data=self.valid_payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['symbol'], 'AAPL')
+        self.assertIn('number_of_trades', response.data['results'][0])
+
+    def test_grid_without_any_valid_pair(self):
+        payload = self.valid_payload.copy()
+        payload['short_ma_min'] = 10
+        payload['short_ma_max'] = 12
+        response = self.client.post(reverse('backtest-grid'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_grid_too_many_pairs(self):
+        payload = self.valid_payload.copy()
+        payload['short_ma_max'] = 200
+        payload['long_ma_max'] = 400
+        response = self.client.post(reverse('backtest-grid'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_grid_windows_are_bounded(self):
+        payload = self.valid_payload.copy()
+        payload['long_ma_max'] = 10 ** 9
+        response = self.client.post(reverse('backtest-grid'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('long_ma_max', response.data)
+
+        payload.update(short_ma_min=1, short_ma_max=5000, long_ma_min=1, long_ma_max=5000)
+        started = time.perf_counter()
+        response = self.client.post(reverse('backtest-grid'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    def test_grid_no_data_for_symbol(self):
+        payload = self.valid_payload.copy()
+        payload['symbol'] = 'NFLX'
+        response = self.client.post(reverse('backtest-grid'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from api.benchmarks import FakeUpstream, TRADING_DAYS_PER_YEAR, compare, daily_payload, run_suite, synthetic_ohlcv
+from api.models import Prediction, StockPrice
+from io import StringIO
+from unittest import mock
+import numpy as np
+
+
+class BenchmarkSuiteTestCase(TestCase):
+    def test_synthetic_ohlcv_is_consistent_and_reproducible(self):
+        symbol, dates, open_, high, low, close, volume = synthetic_ohlcv(3, 2, seed=7)
+        self.assertEqual(symbol, 'BN00003')
+        self.assertEqual(dates.size, 2 * TRADING_DAYS_PER_YEAR)
+        self.assertTrue(np.is_busday(dates).all())
+        self.assertTrue((np.diff(dates.astype(np.int64)) > 0).all())
+        self.assertTrue((low <= np.minimum(open_, close)).all() and (high >= np.maximum(open_, close)).all())
+        np.testing.assert_array_equal(close, synthetic_ohlcv(3, 2, seed=7)[5])
+
+    def test_fake_upstream_serves_compact_and_full_payloads(self):
+        payload = daily_payload(*synthetic_ohlcv(0, 1)[1:])
+        upstream = FakeUpstream(lambda symbol: payload)
+        compact = upstream.get('url', params={'symbol': 'BN00000', 'outputsize': 'compact'}).json()['Time Series (Daily)']
+        full = upstream.get('url', params={'symbol': 'BN00000', 'outputsize': 'full'}).json()['Time Series (Daily)']
+        self.assertEqual(len(compact), 100)
+        self.assertEqual(max(compact), max(full))
+        self.assertEqual(len(full), TRADING_DAYS_PER_YEAR)
+        self.assertEqual(upstream.requests, 2)
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        baseline = {'results': {'ingest': {'min': 1.0}, 'report_cold': {'min': 2.0}, 'gone': {'min': 1.0}}}
+        current = {'results': {'ingest': {'min': 1.1}, 'report_cold': {'min': 2.6}, 'new': {'min': 1.0}}}
+        rows = {row[0]: row for row in compare(current, baseline, threshold=0.2)}
+        self.assertEqual(sorted(rows), ['ingest', 'report_cold'])
+        self.assertFalse(rows['ingest'][4])
+        self.assertTrue(rows['report_cold'][4])
+
+    def test_suite_runs_every_scenario_and_leaves_no_data(self):
+        results = run_suite('tiny', repeat=1, sample=1)
+        self.assertEqual(sorted(results['results']), sorted([
+            'ingest', 'backtest_cold', 'backtest_warm', 'backtest_portfolio',
+            'predict_batch', 'predict_stock', 'report_cold', 'report_warm',
+        ]))
+        self.assertEqual(results['results']['ingest']['items'], TRADING_DAYS_PER_YEAR)
+        self.assertFalse(StockPrice.objects.exists())
+        self.assertFalse(Prediction.objects.exists())
+
+    def test_suite_uses_its_own_cache(self):
+        cache.set('kept', 1)
+        run_suite('tiny', repeat=1, sample=1)
+        self.assertEqual(cache.get('kept'), 1)
+
+    def test_command_refuses_a_database_that_is_not_a_test_database(self):
+        with mock.patch('api.management.commands.run_benchmarks.is_test_database', return_value=False):
+            with self.assertRaises(CommandError):
+                call_command('run_benchmarks', scale='tiny', repeat=1, sample=1, stdout=StringIO())
+            with mock.patch('api.management.commands.run_benchmarks.run_suite') as run:
+                call_command('run_benchmarks', scale='tiny', repeat=1, sample=1, yes=True, stdout=StringIO())
+        run.assert_called_once()
@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase, tag
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib._pylab_helpers import Gcf
+from api.charts import render_price_chart
+from datetime import date, timedelta
+import gc
+import resource
+import sys
+import numpy as np
+
+
+def sample_series(symbol_index):
+    start = np.datetime64('2020-01-01')
+    dates = start + np.arange(250)
+    prices = 100 + np.cumsum(np.sin(np.arange(250) / (5 + symbol_index)))
+    predicted_dates = [date(2020, 9, 7) + timedelta(days=offset) for offset in range(5)]
+    predicted_prices = [float(prices[-1]) + offset for offset in range(5)]
+    return dates, prices, predicted_dates, predicted_prices
+
+
+class ChartRenderingTestCase(SimpleTestCase):
+    def test_renders_png(self):
+        png = render_price_chart('AAPL', *sample_series(0))
+        self.assertTrue(png.startswith(b'\x89PNG'))
+
+    def test_parallel_renders_match_serial_renders(self):
+        symbols = [f'SYM{index}' for index in range(16)]
+        serial = [render_price_chart(symbol, *sample_series(index)) for index, symbol in enumerate(symbols)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            parallel = list(executor.map(lambda args: render_price_chart(args[1], *sample_series(args[0])), enumerate(symbols)))
+        self.assertEqual(serial, parallel)
+
+    @tag('slow')
+    def test_memory_is_stable_over_thousands_of_renders(self):
+        series = sample_series(0)
+
+        def render(count):
+            for _ in range(count):
+                render_price_chart('AAPL', *series, size=(2, 1), dpi=40)
+            gc.collect()
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # A leaked figure costs hundreds of kilobytes, so thousands of them
+        # would move peak RSS by far more than the allowance below.
+        baseline = render(100)
+        peak = render(2000)
+        growth_kb = (peak - baseline) / 1024 if sys.platform == 'darwin' else peak - baseline
+
+        self.assertEqual(Gcf.get_num_fig_managers(), 0)
+        self.assertLess(growth_kb, 32 * 1024)
@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase
+from api.downsampling import downsample, lttb_indices
+import math
+import numpy as np
+
+
+def reference_lttb(x, y, threshold):
+    # Straightforward loop version of the published algorithm.
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = math.floor(i * every) + 1
+        end = n - 1 if i == threshold - 3 else math.floor((i + 1) * every) + 1
+        next_start, next_end = end, min(math.floor((i + 2) * every) + 1, n - 1)
+        if next_start >= next_end:
+            average_x, average_y = x[n - 1], y[n - 1]
+        else:
+            average_x = sum(x[next_start:next_end]) / (next_end - next_start)
+            average_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((x[a] - average_x) * (y[j] - y[a]) - (x[a] - x[j]) * (average_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+class DownsamplingTestCase(SimpleTestCase):
+    def test_matches_reference_implementation(self):
+        rng = np.random.default_rng(1)
+        for n, threshold in ((1000, 100), (1237, 50), (500, 499), (10, 3)):
+            x = np.arange(n, dtype=np.float64)
+            y = np.cumsum(rng.normal(size=n))
+            self.assertEqual(lttb_indices(x, y, threshold).tolist(), reference_lttb(x.tolist(), y.tolist(), threshold))
+
+    def test_keeps_endpoints_and_spikes(self):
+        dates = np.datetime64('2000-01-01') + np.arange(20000).astype('timedelta64[D]')
+        prices = np.full(20000, 100.0)
+        prices[12345] = 500.0
+
+        reduced_dates, reduced_prices = downsample(dates, prices, 1000)
+        self.assertEqual(len(reduced_dates), 1000)
+        self.assertEqual(reduced_dates[0], dates[0])
+        self.assertEqual(reduced_dates[-1], dates[-1])
+        self.assertEqual(reduced_prices.max(), 500.0)
+
+    def test_short_series_and_bypass_are_untouched(self):
+        dates = np.datetime64('2000-01-01') + np.arange(50).astype('timedelta64[D]')
+        prices = np.arange(50, dtype=np.float64)
+        for threshold in (100, None):
+            reduced_dates, reduced_prices = downsample(dates, prices, threshold)
+            self.assertEqual(len(reduced_dates), 50)
+            np.testing.assert_array_equal(reduced_prices, prices)
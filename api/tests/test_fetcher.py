@@ -0,0 +1,128 @@
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+from api.fetcher import TokenBucket, fetch_many
+from api.models import StockPrice
+from api.services import daily_series_fetches
+from api.tests.test_ingestion import daily_payload
+from datetime import timedelta
+from django.utils import timezone
+import json
+import os
+import tempfile
+import threading
+
+
+class StubAlphaVantage(BaseHTTPRequestHandler):
+    throttled_once = set()
+    requests_seen = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        symbol = query['symbol'][0]
+        self.requests_seen.append((symbol, query['outputsize'][0]))
+
+        if symbol == 'DOWN':
+            self._reply(503, {'error': 'unavailable'})
+        elif symbol == 'SLOW' and symbol not in self.throttled_once:
+            self.throttled_once.add(symbol)
+            self._reply(200, {'Note': 'API call frequency exceeded.'})
+        elif symbol == 'NONE':
+            self._reply(200, {'Error Message': 'Invalid API call.'})
+        else:
+            self._reply(200, {'Time Series (Daily)': daily_payload(10, start=timezone.localdate() - timedelta(days=10))})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetchManyTestCase(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubAlphaVantage)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(ALPHA_VANTAGE_API_URL=f'http://127.0.0.1:{cls.server.server_port}/query')
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        daily_series_fetches.forget()
+        StubAlphaVantage.throttled_once.clear()
+        StubAlphaVantage.requests_seen.clear()
+
+    def test_per_symbol_status(self):
+        results = fetch_many(['AAPL', 'MSFT', 'SLOW', 'NONE', 'DOWN'], max_workers=4, rate_per_minute=6000, max_retries=2, backoff=0.01)
+        by_symbol = {result['symbol']: result for result in results}
+
+        self.assertEqual([result['symbol'] for result in results], ['AAPL', 'MSFT', 'SLOW', 'NONE', 'DOWN'])
+        self.assertEqual(by_symbol['AAPL']['status'], 'ok')
+        self.assertEqual(by_symbol['AAPL']['rows'], 10)
+        self.assertEqual(by_symbol['SLOW']['status'], 'ok')
+        self.assertEqual(by_symbol['SLOW']['attempts'], 2)
+        self.assertEqual(by_symbol['NONE']['status'], 'failed')
+        self.assertEqual(by_symbol['NONE']['attempts'], 1)
+        self.assertEqual(by_symbol['DOWN']['status'], 'failed')
+        self.assertEqual(by_symbol['DOWN']['attempts'], 3)
+        self.assertEqual(StockPrice.objects.filter(symbol__in=['AAPL', 'MSFT', 'SLOW']).count(), 30)
+
+    def test_management_command_reads_symbol_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('AAPL\nMSFT\n')
+        self.addCleanup(os.remove, f.name)
+
+        stdout = StringIO()
+        call_command('fetch_stock_data', file=f.name, rate=6000, stdout=stdout, stderr=StringIO())
+        self.assertIn('2 succeeded, 0 skipped, 0 failed', stdout.getvalue())
+
+    def test_watermarks_drive_fetches(self):
+        fetch_many(['AAPL'], rate_per_minute=6000)
+        self.assertEqual(StubAlphaVantage.requests_seen, [('AAPL', 'full')])
+
+        results = fetch_many(['AAPL'], rate_per_minute=6000)
+        self.assertEqual(results[0]['status'], 'skipped')
+        self.assertEqual(len(StubAlphaVantage.requests_seen), 1)
+
+        results = fetch_many(['AAPL'], rate_per_minute=6000, force=True)
+        self.assertEqual(StubAlphaVantage.requests_seen[-1], ('AAPL', 'compact'))
+        self.assertEqual(results[0]['rows'], 0)
+
+
+class TokenBucketTestCase(SimpleTestCase):
+    def test_rate_is_enforced_after_burst(self):
+        now = [0.0]
+        bucket = TokenBucket(60, capacity=2, clock=lambda: now[0], sleep=lambda seconds: now.__setitem__(0, now[0] + seconds))
+        for _ in range(5):
+            bucket.acquire()
+        # Two tokens were available immediately; the remaining three arrive
+        # at one per second.
+        self.assertAlmostEqual(now[0], 3.0)
+
+    def test_no_minute_exceeds_the_rate(self):
+        now = [0.0]
+        taken = []
+        bucket = TokenBucket(5, clock=lambda: now[0], sleep=lambda seconds: now.__setitem__(0, now[0] + seconds))
+        for _ in range(30):
+            bucket.acquire()
+            taken.append(now[0])
+            # Callers arriving at uneven times, including after idle spells.
+            now[0] += [0, 0.5, 40, 3][len(taken) % 4]
+
+        for start in taken:
+            self.assertLessEqual(sum(1 for moment in taken if start <= moment < start + 60 - 1e-9), 5)
@@ -0,0 +1,25 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from api.models import StockPrice
+from io import StringIO
+
+
+class StockPriceIndexTestCase(TestCase):
+    def constraints(self):
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, StockPrice._meta.db_table)
+
+    def test_symbol_date_is_unique(self):
+        unique = [c['columns'] for c in self.constraints().values() if c['unique'] and not c['primary_key']]
+        self.assertIn(['symbol', 'date'], unique)
+
+    def test_close_reads_have_a_covering_index(self):
+        index = self.constraints()['stockprice_symbol_date_close']
+        self.assertEqual(index['columns'], ['symbol', 'date', 'close_price'])
+
+    def test_query_benchmark_leaves_no_rows(self):
+        stdout = StringIO()
+        call_command('benchmark_price_queries', rows=200, symbols=4, repeat=1, stdout=stdout)
+        self.assertIn('Inserted 200 rows for 4 symbols', stdout.getvalue())
+        self.assertFalse(StockPrice.objects.exists())
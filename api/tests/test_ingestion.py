@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test import TestCase
+from unittest import mock
+from api.models import StockPrice, SymbolWatermark
+from api.services import COMPACT_WINDOW_DAYS, INGEST_BATCH_SIZE, daily_series_fetches, fetch_stock_data, plan_fetch, store_stock_data
+from django.utils import timezone
+from datetime import date, timedelta
+from decimal import Decimal
+import math
+
+
+def daily_payload(days, start=date(2020, 1, 1), close=100.0):
+    return {
+        (start + timedelta(days=offset)).isoformat(): {
+            '1. open': f'{close + offset:.4f}',
+            '2. high': f'{close + offset + 1:.4f}',
+            '3. low': f'{close + offset - 1:.4f}',
+            '4. close': f'{close + offset:.4f}',
+            '5. volume': str(1000 + offset),
+        }
+        for offset in range(days)
+    }
+
+
+class StoreStockDataTestCase(TestCase):
+    def setUp(self):
+        daily_series_fetches.forget()
+
+    def test_full_history_is_stored_in_a_handful_of_queries(self):
+        payload = daily_payload(5000)
+        fields = [field for field in StockPrice._meta.concrete_fields if not field.primary_key]
+        batch_size = min(INGEST_BATCH_SIZE, connection.ops.bulk_batch_size(fields, [None] * 5000))
+        # One INSERT ... ON CONFLICT per batch, the watermark upsert and the
+        # savepoint pair.
+        with self.assertNumQueries(math.ceil(5000 / batch_size) + 3):
+            stored = store_stock_data('AAPL', payload)
+        self.assertEqual(stored, 5000)
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL').count(), 5000)
+
+    def test_existing_days_are_updated_in_place(self):
+        store_stock_data('AAPL', daily_payload(3))
+        store_stock_data('AAPL', daily_payload(5, close=200.0))
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL').count(), 5)
+        self.assertEqual(StockPrice.objects.get(symbol='AAPL', date=date(2020, 1, 1)).close_price, Decimal('200.00'))
+
+    def test_only_rows_newer_than_the_watermark_are_written(self):
+        store_stock_data('AAPL', daily_payload(3))
+        StockPrice.objects.filter(symbol='AAPL').update(close_price=1)
+
+        stored = store_stock_data('AAPL', daily_payload(5, close=200.0), since=date(2020, 1, 3))
+        self.assertEqual(stored, 2)
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL', close_price=1).count(), 3)
+        self.assertEqual(SymbolWatermark.objects.get(symbol='AAPL').latest_date, date(2020, 1, 5))
+
+    def test_fetch_requests_upstream_once(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'Time Series (Daily)': daily_payload(3)}
+        with mock.patch('api.services.get_session') as get_session:
+            get_session.return_value.get.return_value = response
+            data = fetch_stock_data('AAPL')
+        get_session.return_value.get.assert_called_once()
+        self.assertEqual(len(data), 3)
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL').count(), 3)
+
+    def test_fetch_without_data(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'Error Message': 'Invalid API call.'}
+        with mock.patch('api.services.get_session') as get_session:
+            get_session.return_value.get.return_value = response
+            with self.assertRaises(ValueError):
+                fetch_stock_data('AAPL')
+        self.assertFalse(StockPrice.objects.exists())
+
+    def test_watermarks_older_than_the_compact_window_fetch_full_history(self):
+        today = timezone.localdate()
+        yesterday = timezone.now() - timedelta(days=1)
+        recent = SymbolWatermark(symbol='AAPL', latest_date=today - timedelta(days=3), last_fetched_at=yesterday)
+        stale = SymbolWatermark(symbol='AAPL', latest_date=today - timedelta(days=COMPACT_WINDOW_DAYS + 1), last_fetched_at=yesterday)
+
+        self.assertEqual(plan_fetch(None), 'full')
+        self.assertEqual(plan_fetch(recent), 'compact')
+        self.assertEqual(plan_fetch(stale), 'full')
+        self.assertEqual(plan_fetch(stale, force=True), 'full')
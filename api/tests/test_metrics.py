@@ -0,0 +1,90 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from unittest import mock
+from api import metrics
+from api.services import request_daily_series
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.client = APIClient()
+
+    def test_histogram_exposition(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', ('kind',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, kind='a')
+        histogram.observe(0.5, kind='a')
+        histogram.observe(5, kind='a')
+        snapshot = {'test_seconds': {'kind': 'histogram', 'help': 'Test.', 'labelnames': ['kind'], **histogram.snapshot()}}
+        text = metrics.exposition(metrics.merge_snapshots([snapshot]))
+
+        self.assertIn('# TYPE test_seconds histogram', text)
+        self.assertIn('test_seconds_bucket{kind="a",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{kind="a",le="1"} 2', text)
+        self.assertIn('test_seconds_bucket{kind="a",le="+Inf"} 3', text)
+        self.assertIn('test_seconds_sum{kind="a"} 5.55', text)
+        self.assertIn('test_seconds_count{kind="a"} 3', text)
+
+    def test_upstream_calls_are_counted_and_timed(self):
+        response = mock.Mock(status_code=503, text='unavailable')
+        with mock.patch('api.services.get_session') as get_session:
+            get_session.return_value.get.return_value = response
+            with self.assertRaises(Exception):
+                request_daily_series('AAPL')
+
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE upstream_requests_total counter', text)
+        self.assertNotIn('# TYPE upstream_requests counter', text)
+        self.assertIn('upstream_requests_total{function="TIME_SERIES_DAILY",status="503"} 1', text)
+        self.assertIn('upstream_request_duration_seconds_count{function="TIME_SERIES_DAILY"} 1', text)
+
+    def test_requests_get_server_timing_and_query_counts(self):
+        response = self.client.get('/api/items/')
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="1 queries", total;dur=[\d.]+$')
+        text = metrics.exposition()
+        self.assertIn('http_requests_total{view="item-list",method="GET",status="200"} 1', text)
+        self.assertIn('db_queries_per_request_bucket{view="item-list",le="0"} 0', text)
+        self.assertIn('db_queries_per_request_bucket{view="item-list",le="1"} 1', text)
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response = self.client.get('/api/items/')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_workers_are_aggregated_through_the_shared_directory(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            metrics.upstream_requests.inc(function='TIME_SERIES_DAILY', status='200')
+            other_worker = {'upstream_requests': {
+                'kind': 'counter', 'help': 'Requests made to the Alpha Vantage API.', 'labelnames': ['function', 'status'],
+                'values': [[['TIME_SERIES_DAILY', '200'], 4]],
+            }}
+            with open(os.path.join(directory, f'{os.getppid()}.json'), 'w') as f:
+                json.dump(other_worker, f)
+
+            text = self.client.get(reverse('metrics')).content.decode()
+            self.assertIn('upstream_requests_total{function="TIME_SERIES_DAILY",status="200"} 5', text)
+            self.assertTrue(os.path.exists(os.path.join(directory, f'{os.getpid()}.json')))
+
+    def test_snapshots_of_exited_workers_are_dropped(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            with open(os.path.join(directory, f'{exited.pid}.json'), 'w') as f:
+                json.dump({'upstream_requests': {'kind': 'counter', 'help': '', 'labelnames': ['function', 'status'], 'values': [[['TIME_SERIES_DAILY', '200'], 4]]}}, f)
+
+            self.assertNotIn('upstream_requests_total{', self.client.get(reverse('metrics')).content.decode())
+            self.assertEqual(os.listdir(directory), [f'{os.getpid()}.json'])
+
+    def test_histogram_snapshots_do_not_share_counts(self):
+        histogram = metrics.Histogram('snapshot_test', 'Test histogram.')
+        histogram.observe(0.1)
+        snapshot = histogram.snapshot()
+        histogram.observe(0.1)
+        self.assertEqual(sum(snapshot['values'][0][1]), 1)
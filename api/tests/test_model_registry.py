@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from api.model_registry import ModelRegistry, warm_up_models
+import os
+import tempfile
+import dill
+
+
+class ModelRegistryTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'model.pkl')
+        self.write_model({'weights': [1, 2, 3]})
+        self.registry = ModelRegistry()
+        self.registry.register('test', self.path)
+
+    def write_model(self, model, mtime=None):
+        with open(self.path, 'wb') as f:
+            dill.dump(model, f)
+        if mtime is not None:
+            os.utime(self.path, ns=(mtime, mtime))
+
+    def test_model_is_loaded_once(self):
+        with mock.patch('api.model_registry.dill.load', wraps=dill.load) as load:
+            first = self.registry.get('test')
+            second = self.registry.get('test')
+        self.assertIs(first, second)
+        self.assertEqual(load.call_count, 1)
+
+    def test_changed_file_is_reloaded(self):
+        old_version = self.registry.get_loaded('test').version
+        self.write_model({'weights': [4, 5, 6]}, mtime=10**18)
+        self.assertEqual(self.registry.get('test'), {'weights': [4, 5, 6]})
+        self.assertNotEqual(self.registry.get_loaded('test').version, old_version)
+
+    def test_touched_file_with_same_content_is_not_reloaded(self):
+        self.registry.get('test')
+        os.utime(self.path, ns=(10**18, 10**18))
+        with mock.patch('api.model_registry.dill.load') as load:
+            self.registry.get('test')
+        load.assert_not_called()
+
+    def test_concurrent_first_use_loads_once(self):
+        with mock.patch('api.model_registry.dill.load', wraps=dill.load) as load:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                models = list(executor.map(lambda _: self.registry.get('test'), range(32)))
+        self.assertEqual(load.call_count, 1)
+        self.assertTrue(all(model is models[0] for model in models))
+
+    def test_info_reports_version_and_load_time(self):
+        self.registry.warm_up()
+        info = self.registry.info()['test']
+        self.assertEqual(len(info['version']), 12)
+        self.assertGreaterEqual(info['load_seconds'], 0)
+
+    def test_warm_up_follows_the_setting(self):
+        with mock.patch('api.model_registry.model_registry', self.registry):
+            with override_settings(MODEL_WARMUP=False):
+                warm_up_models()
+            self.assertEqual(self.registry.info(), {})
+            with override_settings(MODEL_WARMUP=True):
+                warm_up_models()
+        self.assertIn('test', self.registry.info())
+
+
+class ModelStatusViewTestCase(TestCase):
+    def test_status_is_for_admins_only(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('model-status')).status_code, status.HTTP_403_FORBIDDEN)
+        User.objects.create_superuser('admin', password='password')
+        client.login(username='admin', password='password')
+        self.assertEqual(client.get(reverse('model-status')).status_code, status.HTTP_200_OK)
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Prediction, StockPrice, SymbolWatermark
+from api.services import load_model, predict_batch, predict_stock, store_stock_data
+from api.tests.test_ingestion import daily_payload
+from django.utils import timezone
+from datetime import date, timedelta
+import numpy as np
+
+
+class PredictBatchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for symbol, days, base in (('AAPL', 40, 150), ('MSFT', 35, 300), ('TSLA', 10, 200)):
+            for offset in range(days):
+                close = base + offset % 7
+                StockPrice.objects.create(symbol=symbol, date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+
+    def test_batch_matches_single_window_predictions(self):
+        with self.assertNumQueries(2):
+            predictions, errors = predict_batch(['AAPL', 'MSFT', 'TSLA', 'NFLX'])
+
+        self.assertEqual(sorted(predictions), ['AAPL', 'MSFT'])
+        self.assertEqual(sorted(errors), ['NFLX', 'TSLA'])
+
+        model = load_model()
+        closes = [float(price.close_price) for price in StockPrice.objects.filter(symbol='AAPL').order_by('date')]
+        expected = np.ravel(model.predict(np.array(closes[-30:]).reshape(1, -1)))[0]
+        self.assertAlmostEqual(predictions['AAPL'], expected)
+        self.assertEqual(Prediction.objects.count(), 2)
+
+    def test_batch_endpoint(self):
+        response = self.client.post(reverse('predict-batch'), data={'symbols': ['AAPL', 'TSLA']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('AAPL', response.data['predictions'])
+        self.assertIn('TSLA', response.data['errors'])
+
+    def test_batch_endpoint_requires_symbols(self):
+        response = self.client.post(reverse('predict-batch'), data={'symbols': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_repeat_predictions_are_served_from_cache(self):
+        first, _ = predict_batch(['AAPL', 'MSFT'])
+        with mock.patch.object(type(load_model()), 'predict') as model_predict:
+            with self.assertNumQueries(1):
+                second, _ = predict_batch(['AAPL', 'MSFT'])
+        model_predict.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(Prediction.objects.count(), 2)
+
+    def test_repeat_predictions_do_not_duplicate_rows(self):
+        predict_batch(['AAPL'])
+        cache.clear()
+        predict_batch(['AAPL'])
+        self.assertEqual(Prediction.objects.filter(symbol='AAPL').count(), 1)
+
+    def test_ingest_invalidates_cached_predictions(self):
+        before, _ = predict_batch(['AAPL'])
+        StockPrice.objects.filter(symbol='AAPL').update(close_price=10)
+        store_stock_data('AAPL', daily_payload(1, start=date(2023, 3, 1), close=10.0))
+        after, _ = predict_batch(['AAPL'])
+        self.assertNotAlmostEqual(before['AAPL'], after['AAPL'])
+
+    def test_predict_stock_skips_upstream_when_current(self):
+        SymbolWatermark.objects.create(symbol='AAPL', latest_date=date(2023, 2, 9), last_fetched_at=timezone.now())
+        with mock.patch('api.services.request_daily_series') as request:
+            prediction = predict_stock('AAPL')
+        request.assert_not_called()
+        self.assertIsInstance(prediction, float)
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from api.backtest import load_close_series
+from api.models import StockPrice
+from api.price_archive import archive_symbol, archive_version, load_archive, symbol_directory
+from api.price_cache import get_price_series, price_cache
+from api.reports import load_price_window
+from datetime import date, timedelta
+from unittest import mock
+import io
+import numpy as np
+import os
+import tempfile
+
+
+class PriceArchiveTestCase(TestCase):
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        settings_override = override_settings(PRICE_ARCHIVE_DIR=archive_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        price_cache.invalidate()
+
+        self.start = date(2010, 1, 1)
+        StockPrice.objects.bulk_create([
+            StockPrice(symbol='AAPL', date=self.start + timedelta(days=offset), open_price=offset, high_price=offset + 1, low_price=offset - 1, close_price=offset + 0.25, volume=offset * 10)
+            for offset in range(1000)
+        ])
+        self.expected = get_price_series('AAPL')
+
+    def generations(self):
+        return {name.split('.')[0] for name in os.listdir(symbol_directory('AAPL')) if name.endswith('.npy')}
+
+    def test_archived_rows_leave_the_table_and_reads_stay_identical(self):
+        moved = archive_symbol('AAPL', date(2011, 1, 1))
+        self.assertEqual(moved, 365)
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL').count(), 635)
+
+        archived = load_archive('AAPL')
+        self.assertIsInstance(archived[0], np.memmap)
+        self.assertEqual(archived[0][-1], np.datetime64('2010-12-31'))
+
+        series = get_price_series('AAPL')
+        for column, expected in zip(series, self.expected):
+            np.testing.assert_array_equal(column, expected)
+
+        dates, closes = load_close_series(['AAPL'])['AAPL']
+        np.testing.assert_array_equal(closes, self.expected.close)
+
+    def test_archives_grow_and_windows_span_both_tiers(self):
+        archive_symbol('AAPL', date(2010, 7, 1))
+        archive_symbol('AAPL', date(2011, 1, 1))
+        self.assertEqual(load_archive('AAPL')[0].size, 365)
+
+        dates, closes = load_price_window('AAPL', start=date(2010, 12, 30), end=date(2011, 1, 2))
+        self.assertEqual(closes.tolist(), [363.25, 364.25, 365.25, 366.25])
+
+        dates, closes = load_price_window('AAPL', limit=700)
+        np.testing.assert_array_equal(closes, self.expected.close[-700:])
+
+    def test_failed_archiving_never_loses_rows(self):
+        archive_symbol('AAPL', date(2010, 7, 1))
+        before = archive_version('AAPL')
+        with mock.patch('api.price_archive.publish_generation', side_effect=OSError('No space left on device')):
+            with self.assertRaises(OSError):
+                archive_symbol('AAPL', date(2011, 1, 1))
+        self.assertEqual(archive_version('AAPL'), before)
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL').count(), 819)
+
+        # A failed delete leaves the rows in both tiers, where the table wins.
+        # That run removed the generation the failed publish left behind.
+        with mock.patch('django.db.models.query.QuerySet.delete', side_effect=DatabaseError('Lost connection')):
+            with self.assertRaises(DatabaseError):
+                archive_symbol('AAPL', date(2011, 1, 1))
+        self.assertEqual(load_archive('AAPL')[0].size, 365)
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL').count(), 819)
+        price_cache.invalidate()
+        np.testing.assert_array_equal(get_price_series('AAPL').close, self.expected.close)
+
+        self.assertEqual(len(self.generations()), 2)
+        archive_symbol('AAPL', date(2011, 1, 1))
+        self.assertEqual(len(self.generations()), 2)
+        self.assertEqual(StockPrice.objects.filter(symbol='AAPL').count(), 635)
+        price_cache.invalidate()
+        np.testing.assert_array_equal(get_price_series('AAPL').close, self.expected.close)
+
+    def test_only_plain_tickers_become_paths(self):
+        for symbol in ('..', '../..', 'A/B', ''):
+            self.assertIsNone(load_archive(symbol))
+            self.assertIsNone(archive_version(symbol))
+            with self.assertRaises(ValueError):
+                archive_symbol(symbol, date(2011, 1, 1))
+        self.assertEqual(symbol_directory('BRK.B'), os.path.join(settings.PRICE_ARCHIVE_DIR, 'BRK.B'))
+
+    def test_refetched_rows_override_archived_ones(self):
+        archive_symbol('AAPL', date(2011, 1, 1))
+        StockPrice.objects.create(symbol='AAPL', date=date(2010, 6, 1), open_price=1, high_price=1, low_price=1, close_price=1, volume=1)
+
+        series = get_price_series('AAPL')
+        self.assertEqual(len(series), 1000)
+        self.assertEqual(series.close[np.searchsorted(series.dates, np.datetime64('2010-06-01'))], 1.0)
+        self.assertTrue((np.diff(series.dates.astype(np.int64)) > 0).all())
+
+    def test_command_refuses_recent_cutoff(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_prices', before=date.today(), stdout=io.StringIO())
+        call_command('archive_prices', 'AAPL', before=date(2011, 1, 1), stdout=io.StringIO())
+        self.assertEqual(load_archive('AAPL')[0].size, 365)
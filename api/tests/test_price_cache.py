@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.utils import timezone
+from api.models import StockPrice, SymbolWatermark
+from api.price_cache import PriceCache
+from datetime import date
+import numpy as np
+
+
+class PriceCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = PriceCache(max_bytes=10 * 1024 * 1024)
+        StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 2), open_price=152, high_price=158, low_price=151, close_price=157, volume=1200000)
+        StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 1), open_price=150, high_price=155, low_price=149, close_price=152, volume=1000000)
+        StockPrice.objects.create(symbol='MSFT', date=date(2023, 1, 1), open_price=200, high_price=210, low_price=195, close_price=205, volume=500000)
+
+    def test_series_is_columnar_and_ordered(self):
+        series = self.cache.get('AAPL')
+        self.assertEqual(series.dates.dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(series.close.dtype, np.float64)
+        self.assertEqual(series.volume.dtype, np.int64)
+        np.testing.assert_array_equal(series.close, [152.0, 157.0])
+        self.assertFalse(series.close.flags.writeable)
+
+    def test_hit_and_miss_counters(self):
+        self.cache.get('AAPL')
+        self.cache.get('AAPL')
+        self.cache.get('MSFT')
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['entries'], 2)
+
+    def test_new_rows_are_picked_up(self):
+        self.assertEqual(len(self.cache.get('AAPL')), 2)
+        StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 3), open_price=157, high_price=160, low_price=156, close_price=159, volume=1100000)
+        self.assertEqual(len(self.cache.get('AAPL')), 3)
+        self.assertEqual(self.cache.stats()['hits'], 0)
+
+    def test_rows_rewritten_by_a_fetch_are_picked_up(self):
+        self.cache.get('AAPL')
+        # Another process corrects a day in place: same row count and dates.
+        StockPrice.objects.filter(symbol='AAPL', date=date(2023, 1, 1)).update(close_price=153)
+        SymbolWatermark.objects.create(symbol='AAPL', latest_date=date(2023, 1, 2), last_fetched_at=timezone.now())
+        self.assertEqual(self.cache.get('AAPL').close[0], 153.0)
+        self.assertEqual(self.cache.stats()['hits'], 0)
+
+    def test_explicit_invalidation(self):
+        self.cache.get('AAPL')
+        StockPrice.objects.filter(symbol='AAPL', date=date(2023, 1, 1)).update(close_price=153)
+        self.cache.invalidate('AAPL')
+        self.assertEqual(self.cache.get('AAPL').close[0], 153.0)
+
+    def test_lru_eviction_is_bounded_by_bytes(self):
+        entry_bytes = self.cache.get('AAPL').nbytes
+        cache = PriceCache(max_bytes=entry_bytes)
+        cache.get('AAPL')
+        cache.get('MSFT')
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertLessEqual(stats['bytes'], entry_bytes)
+        cache.get('MSFT')
+        self.assertEqual(cache.stats()['hits'], 1)
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.middleware import ProfilingMiddleware
+from api.profiling import collapsed_stacks, list_profiles, profile_call, profile_path
+import pstats
+import tempfile
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        settings_override = override_settings(PROFILING_ENABLED=True, PROFILING_TOKEN='secret', PROFILING_SAMPLE_RATE=0, PROFILING_DIR=profile_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+    def backtest(self, **headers):
+        return self.client.post(reverse('backtest'), {'symbol': 'AAPL', 'initial_investment': 1000, 'short_ma': 5, 'long_ma': 20}, format='json', **headers)
+
+    def test_requested_profile_is_saved_under_the_view_name(self):
+        response = self.backtest(HTTP_X_PROFILE='secret')
+
+        profile_id = response['X-Profile-Id']
+        self.assertIn('-BacktestView-', profile_id)
+        [profile] = list_profiles()
+        self.assertEqual((profile.id, profile.view, profile.method, profile.status), (profile_id, 'BacktestView', 'POST', response.status_code))
+
+        stats = pstats.Stats(profile_path(profile_id, 'pstats'))
+        self.assertTrue(any(name == 'post' for _, _, name in stats.stats))
+        with open(profile_path(profile_id, 'collapsed')) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+        self.assertTrue(any('views.py' in line and ':post;' in line for line in lines))
+
+    def test_query_flag_requests_a_profile(self):
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL', 'profile': 'secret'})
+        self.assertIn('-GenerateReportView-', response['X-Profile-Id'])
+        [profile] = list_profiles()
+        self.assertEqual(profile.path, f"{reverse('generate-report')}?symbol=AAPL")
+
+    def test_other_requests_are_not_profiled(self):
+        self.assertNotIn('X-Profile-Id', self.backtest())
+        self.assertNotIn('X-Profile-Id', self.backtest(HTTP_X_PROFILE='wrong'))
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('generate-report'), {'profile': 'sécret'}))
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/items/', HTTP_X_PROFILE='secret'))
+        self.assertEqual(list_profiles(), [])
+
+    def test_sampled_requests_are_profiled(self):
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            self.client = APIClient()
+            self.assertIn('X-Profile-Id', self.backtest())
+
+    def test_disabled_profiler_is_left_out_of_the_chain(self):
+        with override_settings(PROFILING_ENABLED=False):
+            self.client = APIClient()
+            response = self.backtest(HTTP_X_PROFILE='secret')
+            self.assertNotIn('X-Profile-Id', response)
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: None)
+        self.assertEqual(list_profiles(), [])
+
+    def test_old_profiles_are_pruned(self):
+        with override_settings(PROFILING_MAX_PROFILES=2):
+            for _ in range(3):
+                self.backtest(HTTP_X_PROFILE='secret')
+        self.assertEqual(len(list_profiles()), 2)
+
+    def test_profiles_are_listed_and_served_to_admins_only(self):
+        profile_id = self.backtest(HTTP_X_PROFILE='secret')['X-Profile-Id']
+
+        self.assertEqual(self.client.get(reverse('profiles')).status_code, status.HTTP_403_FORBIDDEN)
+        User.objects.create_user('user', password='password')
+        self.client.login(username='user', password='password')
+        self.assertEqual(self.client.get(reverse('profiles')).status_code, status.HTTP_403_FORBIDDEN)
+
+        User.objects.create_superuser('admin', password='password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get(reverse('profiles'), {'view': 'BacktestView'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([profile['id'] for profile in response.json()], [profile_id])
+        self.assertEqual(self.client.get(reverse('profiles'), {'view': 'PredictStockView'}).json(), [])
+
+        response = self.client.get(response.json()[0]['collapsed_url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'post', b''.join(response.streaming_content))
+        self.assertEqual(self.client.get(reverse('profile-download', kwargs={'profile_id': '..', 'extension': 'pstats'})).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_collapsed_stacks_split_time_between_callers(self):
+        def first():
+            return busy(20000)
+
+        def second():
+            return busy(60000)
+
+        _, stats = profile_call(lambda: (first(), second()))
+        lines = dict(line.rsplit(' ', 1) for line in collapsed_stacks(stats).splitlines())
+        under_first = sum(int(value) for stack, value in lines.items() if ':first;' in stack)
+        under_second = sum(int(value) for stack, value in lines.items() if ':second;' in stack)
+        self.assertGreater(under_second, under_first)
@@ -0,0 +1,80 @@
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest import mock
+from api.charts import render_price_chart
+from api.models import Prediction, StockPrice
+from api.report_cache import ReportCache
+from api.reports import build_report, load_report_data, report_digest
+from datetime import date, timedelta
+import os
+import tempfile
+import time
+
+
+class ReportCacheTestCase(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        settings_override = override_settings(REPORT_CACHE_DIR=self.cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        for offset in range(30):
+            close = 150 + offset % 5
+            StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+        Prediction.objects.create(symbol='AAPL', date=date(2023, 1, 31), predicted_price=155.5)
+
+    def test_identical_inputs_are_rendered_once(self):
+        with mock.patch('api.reports.render_price_chart', wraps=render_price_chart) as render:
+            first = build_report('AAPL')
+            second = build_report('AAPL')
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first.digest, second.digest)
+        self.assertTrue(second.pdf.startswith(b'%PDF'))
+
+    def test_new_inputs_change_the_digest(self):
+        before = report_digest('AAPL', load_report_data('AAPL'))
+        Prediction.objects.create(symbol='AAPL', date=date(2023, 2, 1), predicted_price=156.0)
+        after = report_digest('AAPL', load_report_data('AAPL'))
+        self.assertNotEqual(before, after)
+
+    def test_least_recently_used_reports_are_evicted(self):
+        cache = ReportCache(directory=self.cache_dir, max_bytes=250)
+        cache.put('A', 'a' * 64, b'x' * 50, b'x' * 50)
+        cache.put('B', 'b' * 64, b'x' * 50, b'x' * 50)
+        # Make A older than B, then read it so it becomes the most recent.
+        for name in os.listdir(os.path.join(self.cache_dir, 'aa')):
+            os.utime(os.path.join(self.cache_dir, 'aa', name), (time.time() - 60, time.time() - 60))
+        self.assertIsNotNone(cache.get('A', 'a' * 64))
+
+        cache.put('C', 'c' * 64, b'x' * 50, b'x' * 50)
+        self.assertIsNotNone(cache.get('A', 'a' * 64))
+        self.assertIsNone(cache.get('B', 'b' * 64))
+        self.assertIsNotNone(cache.get('C', 'c' * 64))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_reports_are_read_before_they_can_be_evicted(self):
+        cache = ReportCache(directory=self.cache_dir, max_bytes=100)
+        report = cache.put('A', 'a' * 64, b'png', b'pdf')
+        cached = cache.get('A', 'a' * 64)
+        cache.put('B', 'b' * 64, b'x' * 50, b'x' * 50)
+
+        self.assertEqual((report.png, report.pdf), (b'png', b'pdf'))
+        self.assertEqual((cached.png, cached.pdf), (b'png', b'pdf'))
+        self.assertIsNone(cache.get('A', 'a' * 64))
+        os.remove(os.path.join(self.cache_dir, 'bb', f"{'b' * 64}.pdf"))
+        self.assertIsNone(cache.get('B', 'b' * 64))
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = f'"{report_digest("AAPL", load_report_data("AAPL"))}"'
+        with mock.patch('api.views.build_report') as build:
+            response = self.client.get('/api/generate-report/', {'symbol': 'AAPL'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        build.assert_not_called()
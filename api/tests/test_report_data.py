@@ -0,0 +1,61 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Prediction, StockPrice
+from api.price_cache import price_cache
+from api.reports import load_report_data
+from datetime import date, timedelta
+import numpy as np
+import tempfile
+
+
+class ReportDataTestCase(TestCase):
+    def setUp(self):
+        price_cache.invalidate()
+        self.client = APIClient()
+
+    def store(self, symbol, days):
+        StockPrice.objects.bulk_create([
+            StockPrice(symbol=symbol, date=date(2000, 1, 1) + timedelta(days=offset), open_price=100, high_price=101, low_price=99, close_price=100 + offset, volume=1000)
+            for offset in range(days)
+        ])
+        Prediction.objects.create(symbol=symbol, date=date(2000, 1, 1) + timedelta(days=days), predicted_price=150)
+
+    def test_window_query_count_does_not_grow_with_history(self):
+        self.store('SHORT', 100)
+        self.store('LONG', 5000)
+        for symbol in ('SHORT', 'LONG'):
+            with self.assertNumQueries(2):
+                data = load_report_data(symbol, limit=60)
+            self.assertEqual(len(data.historical_dates), 60)
+
+    def test_full_history_uses_price_cache(self):
+        self.store('AAPL', 300)
+        load_report_data('AAPL')
+        # One freshness check on the cached series plus the predictions.
+        with self.assertNumQueries(2):
+            data = load_report_data('AAPL')
+        self.assertEqual(len(data.historical_prices), 300)
+
+    def test_start_end_and_limit(self):
+        self.store('AAPL', 300)
+        data = load_report_data('AAPL', start=date(2000, 2, 1), end=date(2000, 3, 31))
+        self.assertEqual(data.historical_dates[0], np.datetime64('2000-02-01'))
+        self.assertEqual(data.historical_dates[-1], np.datetime64('2000-03-31'))
+
+        data = load_report_data('AAPL', end=date(2000, 12, 31), limit=5)
+        self.assertEqual(data.historical_prices.tolist(), [395.0, 396.0, 397.0, 398.0, 399.0])
+        self.assertEqual(data.predicted_dates, [date(2000, 10, 27)])
+
+    def test_view_validates_window(self):
+        self.store('AAPL', 30)
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL', 'start': '2000-02-01', 'end': '2000-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL', 'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(REPORT_CACHE_DIR=cache_dir):
+            response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL', 'limit': 10})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response.close()
@@ -0,0 +1,91 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest import mock
+from api.models import Prediction, StockPrice
+from datetime import date, timedelta
+import tempfile
+
+
+class ReportDeliveryTestCase(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        for offset in range(30):
+            close = 150 + offset % 5
+            StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+        Prediction.objects.create(symbol='AAPL', date=date(2023, 1, 31), predicted_price=155.5)
+
+    def get_report(self, **params):
+        return self.client.get(reverse('generate-report'), {'symbol': 'AAPL', **params})
+
+    def test_pdf_is_streamed_inline(self):
+        response = self.get_report()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        body = b''.join(response.streaming_content)
+        self.assertTrue(body.startswith(b'%PDF'))
+        self.assertEqual(int(response['Content-Length']), len(body))
+
+    def test_attachment_disposition(self):
+        response = self.get_report(disposition='attachment')
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+        self.assertIn('AAPL_report.pdf', response['Content-Disposition'])
+
+    def test_range_requests(self):
+        full = b''.join(self.get_report().streaming_content)
+
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL'}, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(full)}')
+        self.assertEqual(b''.join(response.streaming_content), full[10:20])
+
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL'}, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), full[-5:])
+
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL'}, HTTP_RANGE=f'bytes={len(full)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(full)}')
+
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL'}, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL'}, HTTP_RANGE=f'bytes={len(full)}-', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), full)
+
+        response = self.client.get(reverse('generate-report'), {'symbol': 'AAPL'}, HTTP_RANGE='bytes=20-10')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), full)
+
+    def test_html_links_cached_artifacts_without_rerendering(self):
+        response = self.get_report(output='html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pdf_url = response.context['pdf_url']
+        self.assertIn('/api/reports/artifacts/AAPL/', pdf_url)
+
+        with mock.patch('api.reports.render_price_chart') as render:
+            response = self.client.get(pdf_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+            response = self.client.get(response.wsgi_request.path.replace('.pdf', '.png'))
+            self.assertEqual(response['Content-Type'], 'image/png')
+        render.assert_not_called()
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_artifact_urls_are_checked(self):
+        url = reverse('report-artifact', kwargs={'symbol': 'AAPL', 'digest': 'ABC..def', 'extension': 'pdf'})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        url = reverse('report-artifact', kwargs={'symbol': 'A&B', 'digest': '0' * 64, 'extension': 'pdf'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(response['Location'], f"{reverse('generate-report')}?symbol=A%26B")
@@ -0,0 +1,67 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Prediction, ReportJob, StockPrice
+from django.utils import timezone
+from datetime import date, timedelta
+import tempfile
+
+
+class ReportJobTestCase(TestCase):
+    def setUp(self):
+        reports_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(reports_dir.cleanup)
+        settings_override = override_settings(REPORTS_DIR=reports_dir.name, REPORT_CACHE_DIR=f'{reports_dir.name}/cache')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        for offset in range(30):
+            close = 150 + offset % 5
+            StockPrice.objects.create(symbol='AAPL', date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+        Prediction.objects.create(symbol='AAPL', date=date(2023, 1, 31), predicted_price=155.5)
+
+    def submit(self, symbol):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('report-jobs'), data={'symbol': symbol}, format='json')
+
+    def test_submit_poll_and_download(self):
+        response = self.submit('AAPL')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data['id']
+
+        response = self.client.get(reverse('report-job', kwargs={'job_id': job_id}))
+        self.assertEqual(response.data['status'], ReportJob.SUCCEEDED)
+        self.assertEqual(response.data['progress'], 100)
+
+        response = self.client.get(response.data['download_url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_failed_job_reports_error(self):
+        response = self.submit('MSFT')
+        job = ReportJob.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, ReportJob.FAILED)
+        self.assertIn('No prediction data available for MSFT', job.error)
+
+        response = self.client.get(reverse('report-job-download', kwargs={'job_id': job.id}))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    @override_settings(REPORT_JOBS_MAX_PENDING=1)
+    def test_pending_jobs_are_limited(self):
+        ReportJob.objects.create(symbol='AAPL')
+        response = self.client.post(reverse('report-jobs'), data={'symbol': 'AAPL'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REPORT_JOBS_MAX_PENDING=1, REPORT_JOBS_STALE_AFTER=60)
+    def test_jobs_abandoned_by_a_worker_stop_counting(self):
+        job = ReportJob.objects.create(symbol='AAPL', status=ReportJob.RUNNING)
+        ReportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+
+        response = self.submit('AAPL')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.FAILED)
+        self.assertIn('stopped reporting progress', job.error)
@@ -0,0 +1,81 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest import mock
+from api.models import Prediction, StockPrice
+from api.report_pack import stream_report_pack
+from api.reports import load_report_data
+from datetime import date, timedelta
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+
+class ReportPackTestCase(TestCase):
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = temporary.name
+        settings_override = override_settings(REPORT_CACHE_DIR=os.path.join(self.directory, 'cache'), REPORT_PACK_MAX_WORKERS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        for symbol in ('AAPL', 'MSFT', 'GOOG'):
+            for offset in range(30):
+                close = 150 + offset % 5
+                StockPrice.objects.create(symbol=symbol, date=date(2023, 1, 1) + timedelta(days=offset), open_price=close, high_price=close + 1, low_price=close - 1, close_price=close, volume=1000000)
+            Prediction.objects.create(symbol=symbol, date=date(2023, 1, 31), predicted_price=155.5)
+
+    def test_pack_is_streamed_with_failure_manifest(self):
+        response = self.client.post(reverse('report-pack'), data={'symbols': ['AAPL', 'MSFT', 'GOOG', 'NONE']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), ['AAPL.pdf', 'AAPL.png', 'GOOG.pdf', 'GOOG.png', 'MSFT.pdf', 'MSFT.png', 'manifest.json'])
+        self.assertTrue(archive.read('MSFT.pdf').startswith(b'%PDF'))
+
+        manifest = json.loads(archive.read('manifest.json'))
+        self.assertEqual(sorted(manifest['generated']), ['AAPL', 'GOOG', 'MSFT'])
+        self.assertIn('No prediction data available for NONE', manifest['failures']['NONE'])
+
+    def test_command_reuses_cached_reports(self):
+        output = os.path.join(self.directory, 'pack.zip')
+        call_command('generate_report_pack', 'AAPL', 'MSFT', output=output, workers=1, stdout=io.StringIO())
+
+        with mock.patch('api.report_pack.render_report') as render:
+            call_command('generate_report_pack', 'AAPL', 'MSFT', output=output, workers=1, stdout=io.StringIO())
+        render.assert_not_called()
+
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(json.loads(archive.read('manifest.json'))['generated'], ['AAPL', 'MSFT'])
+
+    def test_report_data_is_loaded_as_the_pack_is_streamed(self):
+        with mock.patch('api.report_pack.load_report_data', wraps=load_report_data) as load:
+            chunks = stream_report_pack(['AAPL', 'MSFT', 'GOOG'], max_workers=1)
+            next(chunks)
+            self.assertEqual(load.call_count, 1)
+            list(chunks)
+        self.assertEqual(load.call_count, 3)
+
+    def test_evicted_reports_are_rendered_again(self):
+        call_command('generate_report_pack', 'AAPL', 'MSFT', output=os.path.join(self.directory, 'pack.zip'), workers=1, stdout=io.StringIO())
+        for root, _, files in os.walk(os.path.join(self.directory, 'cache')):
+            for name in files:
+                if name.endswith('.pdf'):
+                    os.remove(os.path.join(root, name))
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_report_pack(['AAPL', 'MSFT'], max_workers=2))))
+        manifest = json.loads(archive.read('manifest.json'))
+        self.assertEqual(sorted(manifest['generated']), ['AAPL', 'MSFT'])
+        self.assertEqual(manifest['failures'], {})
+        self.assertTrue(archive.read('AAPL.pdf').startswith(b'%PDF'))
+
+    def test_empty_symbol_list_is_rejected(self):
+        response = self.client.post(reverse('report-pack'), data={'symbols': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
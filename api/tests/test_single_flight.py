@@ -0,0 +1,204 @@
+from django.test import SimpleTestCase, override_settings
+from unittest import mock
+from api import metrics
+from api.services import UpstreamError, daily_series_fetches, request_daily_series
+from api.single_flight import SingleFlight
+from api.tests.test_ingestion import daily_payload
+import asyncio
+import threading
+
+
+def run_together(count, function):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(index):
+        try:
+            results[index] = function()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def not_called():
+    raise AssertionError('a coalesced caller ran the function')
+
+
+async def not_awaited():
+    not_called()
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    def setUp(self):
+        daily_series_fetches.forget()
+        metrics.registry.reset()
+
+    def blocking_call(self, result=None, error=None):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.invocations = 0
+
+        def call():
+            self.invocations += 1
+            self.started.set()
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return result
+        return call
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight(ttl=0)
+        call = self.blocking_call(result={'rows': 1})
+        threads, results, errors = run_together(10, lambda: flight.do('AAPL', call))
+
+        self.started.wait(5)
+        # Let every other thread reach the in-flight call before it finishes.
+        while flight.stats()['calls'] + flight.stats()['coalesced'] < 10:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.invocations, 1)
+        self.assertEqual(errors, [None] * 10)
+        self.assertTrue(all(result[0] is results[0][0] for result in results))
+        self.assertEqual(sorted(outcome for _, outcome in results), ['called'] + ['coalesced'] * 9)
+        self.assertEqual(flight.stats(), {'calls': 1, 'coalesced': 9, 'reused': 0, 'in_flight': 0})
+
+    def test_errors_are_shared_but_not_kept(self):
+        flight = SingleFlight(ttl=60)
+        call = self.blocking_call(error=ValueError('upstream down'))
+        threads, results, errors = run_together(3, lambda: flight.do('AAPL', call))
+        self.started.wait(5)
+        while flight.stats()['coalesced'] < 2:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+        self.assertEqual(flight.do('AAPL', lambda: 'fresh'), ('fresh', 'called'))
+
+    def test_results_are_reused_within_the_ttl(self):
+        flight = SingleFlight(ttl=60)
+        self.assertEqual(flight.do('AAPL', lambda: 1), (1, 'called'))
+        self.assertEqual(flight.do('AAPL', lambda: 2), (1, 'reused'))
+        self.assertEqual(flight.do('MSFT', lambda: 3), (3, 'called'))
+
+        flight.forget('AAPL')
+        self.assertEqual(flight.do('AAPL', lambda: 4), (4, 'called'))
+        with mock.patch('api.single_flight.time.monotonic', return_value=10 ** 9):
+            self.assertEqual(flight.do('AAPL', lambda: 5), (5, 'called'))
+
+        without_ttl = SingleFlight(ttl=0)
+        without_ttl.do('AAPL', lambda: 1)
+        self.assertEqual(without_ttl.do('AAPL', lambda: 2), (2, 'called'))
+
+    @override_settings(UPSTREAM_COALESCE_TTL=30)
+    def test_concurrent_fetches_of_a_symbol_make_one_upstream_request(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'Time Series (Daily)': daily_payload(3)}
+        fetch = self.blocking_call(result=response)
+        coalesced = daily_series_fetches.stats()['coalesced']
+
+        with mock.patch('api.services.get_session') as get_session:
+            get_session.return_value.get.side_effect = lambda *args, **kwargs: fetch()
+            threads, results, errors = run_together(8, lambda: request_daily_series('AAPL'))
+            self.started.wait(5)
+            while daily_series_fetches.stats()['coalesced'] - coalesced < 7:
+                threading.Event().wait(0.001)
+            self.release.set()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [None] * 8)
+            self.assertEqual(get_session.return_value.get.call_count, 1)
+            self.assertTrue(all(result == daily_payload(3) for result in results))
+
+            # Shortly after, the same series is still answered locally; a
+            # different output size is a separate request.
+            request_daily_series('AAPL')
+            request_daily_series('AAPL', 'full')
+            self.assertEqual(get_session.return_value.get.call_count, 2)
+
+        text = metrics.exposition()
+        self.assertIn('upstream_coalesced_total{function="TIME_SERIES_DAILY",outcome="coalesced"} 7', text)
+        self.assertIn('upstream_coalesced_total{function="TIME_SERIES_DAILY",outcome="reused"} 1', text)
+        self.assertIn('upstream_requests_total{function="TIME_SERIES_DAILY",status="200"} 2', text)
+
+    def test_each_waiter_raises_its_own_copy_of_the_error(self):
+        flight = SingleFlight(ttl=0)
+        call = self.blocking_call(error=UpstreamError('throttled', 429, retryable=True))
+        threads, results, errors = run_together(4, lambda: flight.do('AAPL', call))
+        self.started.wait(5)
+        while flight.stats()['coalesced'] < 3:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(error) for error in errors}), 4)
+        self.assertTrue(all(isinstance(error, UpstreamError) and error.status_code == 429 and error.retryable for error in errors))
+        errors[0].attempts = 3
+        self.assertFalse(any(hasattr(error, 'attempts') for error in errors[1:]))
+
+    def test_threads_and_coroutines_share_calls(self):
+        flight = SingleFlight(ttl=0)
+        call = self.blocking_call(result='sync')
+        threads, results, _ = run_together(1, lambda: flight.do('AAPL', call))
+        self.started.wait(5)
+
+        async def follow():
+            pending = asyncio.gather(*(flight.ado('AAPL', not_awaited) for _ in range(3)))
+            await asyncio.sleep(0.01)
+            self.release.set()
+            return await pending
+        self.assertEqual(asyncio.run(follow()), [('sync', 'coalesced')] * 3)
+        threads[0].join()
+
+        async def lead():
+            await asyncio.sleep(0.05)
+            return 'async'
+
+        async def both():
+            leader = asyncio.ensure_future(flight.ado('MSFT', lead))
+            await asyncio.sleep(0.01)
+            follower = await asyncio.to_thread(flight.do, 'MSFT', not_called)
+            return await leader, follower
+        self.assertEqual(asyncio.run(both()), (('async', 'called'), ('async', 'coalesced')))
+
+    def test_waiters_take_over_a_cancelled_call(self):
+        flight = SingleFlight(ttl=0)
+        calls = []
+
+        async def fetch():
+            calls.append(len(calls))
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        def sync_fetch():
+            threading.Event().wait(0.05)
+            return 'sync'
+
+        async def cancel_leader():
+            leader = asyncio.ensure_future(flight.ado('AAPL', fetch))
+            await asyncio.sleep(0.01)
+            waiters = asyncio.gather(*(flight.ado('AAPL', fetch) for _ in range(3)))
+            thread = asyncio.ensure_future(asyncio.to_thread(flight.do, 'AAPL', sync_fetch))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await waiters, await thread
+
+        waiters, thread = asyncio.run(cancel_leader())
+        # One caller leads the retry and everyone else shares it.
+        outcomes = sorted(outcome for _, outcome in waiters + [thread])
+        self.assertEqual(outcomes, ['called', 'coalesced', 'coalesced', 'coalesced'])
+        self.assertEqual(len({result for result, _ in waiters + [thread]}), 1)
+        self.assertEqual(flight.stats()['in_flight'], 0)
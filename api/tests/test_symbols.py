@@ -0,0 +1,79 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Symbol
+from api.services import parse_listing, store_symbols
+from api.symbol_index import symbol_index
+import io
+import tempfile
+import time
+
+LISTING = '''symbol,name,exchange,assetType,ipoDate,delistingDate,status
+A,Agilent Technologies Inc,NYSE,Stock,1999-11-18,null,Active
+AA,Alcoa Corp,NYSE,Stock,2016-10-18,null,Active
+AAPL,Apple Inc,NASDAQ,Stock,1980-12-12,null,Active
+AMZN,Amazon.com Inc,NASDAQ,Stock,1997-05-15,null,Active
+MSFT,Microsoft Corporation,NASDAQ,Stock,1986-03-13,null,Active
+APLE,Apple Hospitality REIT Inc,NYSE,Stock,2015-05-18,null,Active
+'''
+
+
+class SymbolDirectoryTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        store_symbols(parse_listing(LISTING))
+
+    def search(self, query, limit=10):
+        return [result['symbol'] for result in symbol_index.search(query, limit)]
+
+    def test_prefix_search_ranks_tickers_before_names(self):
+        self.assertEqual(self.search('aa'), ['AA', 'AAPL'])
+        self.assertEqual(self.search('AP'), ['APLE', 'AAPL'])
+        self.assertEqual(self.search('apple'), ['APLE', 'AAPL'])
+        self.assertEqual(self.search('A', limit=3), ['A', 'AA', 'AAPL'])
+        self.assertEqual(self.search('zzz'), [])
+        self.assertEqual(self.search('  '), [])
+
+    def test_refresh_replaces_listing_and_rebuilds_index(self):
+        self.assertEqual(self.search('MSFT'), ['MSFT'])
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as listing:
+            listing.write('\n'.join(line for line in LISTING.splitlines() if not line.startswith('MSFT')) + '\nNVDA,NVIDIA Corp,NASDAQ,Stock,1999-01-22,null,Active\n')
+            listing.flush()
+            call_command('refresh_symbols', file=listing.name, stdout=io.StringIO())
+
+        self.assertFalse(Symbol.objects.filter(symbol='MSFT').exists())
+        self.assertEqual(self.search('MSFT'), [])
+        self.assertEqual(self.search('nv'), ['NVDA'])
+
+    def test_changes_made_by_other_processes_are_picked_up(self):
+        self.assertEqual(self.search('NV'), [])
+        # Written the way refresh_symbols in another process would, without
+        # anything in this process being told.
+        Symbol.objects.create(symbol='NVDA', name='NVIDIA Corp')
+        with override_settings(SYMBOL_INDEX_CHECK_INTERVAL=60):
+            self.assertEqual(self.search('NV'), [])
+        with override_settings(SYMBOL_INDEX_CHECK_INTERVAL=0):
+            self.assertEqual(self.search('NV'), ['NVDA'])
+
+    def test_lookup_does_not_touch_the_database(self):
+        Symbol.objects.bulk_create([Symbol(symbol=f'S{i:05d}', name=f'Company {i}') for i in range(20000)])
+        symbol_index.build()
+        symbol_index.search('S1')
+
+        with self.assertNumQueries(0):
+            started = time.perf_counter()
+            for _ in range(100):
+                results = symbol_index.search('S123', 10)
+            elapsed = (time.perf_counter() - started) / 100
+        self.assertEqual(len(results), 10)
+        self.assertLess(elapsed, 0.001)
+
+    def test_search_endpoint(self):
+        response = self.client.get(reverse('symbol-search'), {'q': 'aap'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'symbol': 'AAPL', 'name': 'Apple Inc', 'exchange': 'NASDAQ'}])
+
+        response = self.client.get(reverse('symbol-search'), {'q': 'a', 'limit': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BacktestView, ItemViewSet, PredictStockView, GenerateReportView, AvailableSymbolsView
+from .views import AsyncPredictStockView, AsyncSymbolSearchView, BacktestView, BacktestBatchView, BacktestGridView, ItemViewSet, PredictStockView, GenerateReportView, AvailableSymbolsView, MetricsView, ModelStatusView, PredictBatchView, ProfileDownloadView, ProfileListView, ReportJobDetailView, ReportJobDownloadView, ReportArtifactView, ReportJobListView, ReportPackView, SymbolSearchView
 
 router = DefaultRouter()
 router.register(r'items', ItemViewSet)
@@ -8,7 +8,22 @@ router.register(r'items', ItemViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('backtest/', BacktestView.as_view(), name='backtest'),
+    path('backtest/batch/', BacktestBatchView.as_view(), name='backtest-batch'),
+    path('backtest/grid/', BacktestGridView.as_view(), name='backtest-grid'),
     path('predict/', PredictStockView.as_view(), name='predict'),
+    path('async/predict/', AsyncPredictStockView.as_view(), name='async-predict'),
+    path('predict/batch/', PredictBatchView.as_view(), name='predict-batch'),
+    path('models/', ModelStatusView.as_view(), name='model-status'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('profiles/', ProfileListView.as_view(), name='profiles'),
+    path('profiles/<str:profile_id>.<str:extension>', ProfileDownloadView.as_view(), name='profile-download'),
     path('generate-report/', GenerateReportView.as_view(), name='generate-report'),
+    path('reports/', ReportJobListView.as_view(), name='report-jobs'),
+    path('reports/<uuid:job_id>/', ReportJobDetailView.as_view(), name='report-job'),
+    path('reports/<uuid:job_id>/download/', ReportJobDownloadView.as_view(), name='report-job-download'),
+    path('reports/pack/', ReportPackView.as_view(), name='report-pack'),
+    path('reports/artifacts/<str:symbol>/<str:digest>.<str:extension>', ReportArtifactView.as_view(), name='report-artifact'),
     path('available-symbols/', AvailableSymbolsView.as_view(), name='available-symbols'),
+    path('symbols/search/', SymbolSearchView.as_view(), name='symbol-search'),
+    path('async/symbols/search/', AsyncSymbolSearchView.as_view(), name='async-symbol-search'),
 ]
\ No newline at end of file
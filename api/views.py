@@ -1,29 +1,40 @@
-import io
-from django.http import JsonResponse
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 import joblib
-import requests
 import numpy as np
-from api.backtest import run_backtest
-from api.serializers import BacktestSerializer, ItemSerializer
-from .models import Item, Prediction, StockPrice
+from api.backtest import run_backtest, run_backtest_grid, run_portfolio_backtest
+from api.serializers import BacktestBatchSerializer, BacktestGridSerializer, BacktestSerializer, ItemSerializer, PredictBatchSerializer, ReportJobSerializer, ReportPackSerializer, ReportWindowSerializer
+from .models import Item, Prediction, ReportJob, StockPrice
 from datetime import timedelta
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
-import matplotlib.pyplot as plot
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from .services import fetch_stock_data, predict_stock
-import os
+from .metrics import exposition
+from .async_services import apredict_stock
+from .model_registry import model_registry
+from .profiling import list_profiles, profile_path
+from .report_cache import DIGEST_PATTERN, report_cache
+from .report_pack import stream_report_pack
+from .reports import build_report, load_report_data, report_digest
+from .streaming import file_response
+from .symbol_index import symbol_index
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
+from .services import fetch_stock_data, predict_batch, predict_stock
+from .tasks import expire_stale_jobs, generate_report
 from django.conf import settings
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
-ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
-
 class ItemViewSet(viewsets.ModelViewSet):
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
@@ -45,24 +56,77 @@ class BacktestView(APIView):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class BacktestGridView(APIView):
+    def post(self, request):
+        serializer = BacktestGridSerializer(data=request.data)
+        if serializer.is_valid():
+            symbol = serializer.validated_data['symbol']
+            initial_investment = serializer.validated_data['initial_investment']
+            short_ma_values = serializer.validated_data['short_ma_values']
+            long_ma_values = serializer.validated_data['long_ma_values']
+
+            try:
+                results = run_backtest_grid(symbol, initial_investment, short_ma_values, long_ma_values)
+                return Response({"symbol": symbol, "results": results}, status=status.HTTP_200_OK)
+            except Exception as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class BacktestBatchView(APIView):
+    def post(self, request):
+        serializer = BacktestBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            symbols = serializer.validated_data['symbols']
+            initial_investment = serializer.validated_data['initial_investment']
+            short_ma = serializer.validated_data['short_ma']
+            long_ma = serializer.validated_data['long_ma']
+
+            try:
+                batch_result = run_portfolio_backtest(symbols, initial_investment, short_ma, long_ma)
+                return Response(batch_result, status=status.HTTP_200_OK)
+            except Exception as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 class AvailableSymbolsView(APIView):
     def get(self, request, *args, **kwargs):
-        url = f"https://www.alphavantage.co/query?function=LISTING_STATUS&apikey={ALPHA_VANTAGE_API_KEY}"
+        return render(request, 'stock_picker.html')
 
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
 
-            symbols_data = response.text.splitlines()
-            symbols = [line.split(',')[0] for line in symbols_data[1:]]
+def parse_search_limit(value, max_limit):
+    # (limit, None) or (None, error message)
+    try:
+        limit = min(int(value), max_limit)
+    except ValueError:
+        return None, 'limit must be an integer'
+    if limit < 1:
+        return None, 'limit must be positive'
+    return limit, None
 
-            if not symbols:
-                return Response({'error': 'No symbols found from Alpha Vantage'}, status=status.HTTP_404_NOT_FOUND)
 
-        except requests.RequestException as e:
-            return Response({'error': 'An error occurred while fetching symbols from Alpha Vantage'},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return render(request, 'stock_picker.html', {'symbols': symbols})
+class SymbolSearchView(APIView):
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        limit, error = parse_search_limit(request.query_params.get('limit', 10), self.MAX_LIMIT)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'results': symbol_index.search(request.query_params.get('q', ''), limit)}, status=status.HTTP_200_OK)
+
+
+class AsyncSymbolSearchView(View):
+    # Same as SymbolSearchView, for the ASGI server.
+    MAX_LIMIT = SymbolSearchView.MAX_LIMIT
+
+    async def get(self, request):
+        limit, error = parse_search_limit(request.GET.get('limit', 10), self.MAX_LIMIT)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+        return JsonResponse({'results': await symbol_index.asearch(request.GET.get('q', ''), limit)}, status=200)
 
 
 class PredictStockView(APIView):
@@ -93,54 +157,221 @@ class PredictStockView(APIView):
             return JsonResponse({'error': f"Unexpected error: {str(e)}"}, status=500)
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncPredictStockView(View):
+    # PredictStockView for the ASGI server: the event loop is free while the
+    # upstream refresh, database reads and inference are in flight.
+    async def post(self, request):
+        data = request.POST
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                return JsonResponse({'error': 'Request body must be a JSON object'}, status=400)
+
+        symbol = data.get('symbol')
+        logger.info(f"Received symbol: {symbol}")
+
+        if not symbol:
+            return JsonResponse({'error': 'No symbol provided'}, status=400)
+
+        try:
+            prediction = await apredict_stock(symbol)
+            return JsonResponse({'symbol': symbol, 'prediction': prediction}, status=200)
+
+        except ValueError as ve:
+            logger.error(f"ValueError: {ve}")
+            return JsonResponse({'error': str(ve)}, status=400)
+
+        except FileNotFoundError as fe:
+            logger.error(f"FileNotFoundError: {fe}")
+            return JsonResponse({'error': str(fe)}, status=404)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error occurred: {e}")
+            return JsonResponse({'error': f"Unexpected error: {str(e)}"}, status=500)
+
+
+class PredictBatchView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = PredictBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            predictions, errors = predict_batch(serializer.validated_data['symbols'])
+            return Response({'predictions': predictions, 'errors': errors}, status=status.HTTP_200_OK)
+
+        except FileNotFoundError as fe:
+            logger.error(f"FileNotFoundError: {fe}")
+            return Response({'error': str(fe)}, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error occurred: {e}")
+            return Response({'error': f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ReportJobListView(APIView):
+    def post(self, request):
+        serializer = ReportJobSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        expire_stale_jobs()
+        active = ReportJob.objects.filter(status__in=[ReportJob.PENDING, ReportJob.RUNNING]).count()
+        if active >= settings.REPORT_JOBS_MAX_PENDING:
+            return Response({'error': 'Too many report jobs in progress, try again later'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        job = serializer.save()
+        # Only hand the job to a worker once the row is visible to it.
+        transaction.on_commit(lambda: generate_report.delay(str(job.id)))
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ReportJobDetailView(APIView):
+    def get(self, request, job_id):
+        job = get_object_or_404(ReportJob, pk=job_id)
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class ReportJobDownloadView(APIView):
+    def get(self, request, job_id):
+        job = get_object_or_404(ReportJob, pk=job_id)
+        if job.status != ReportJob.SUCCEEDED:
+            return Response({'error': f'Report is {job.status}', 'progress': job.progress}, status=status.HTTP_409_CONFLICT)
+
+        return file_response(request, job.pdf_path, 'application/pdf', f'{job.symbol}_report.pdf', as_attachment=True)
+
+
+class ReportPackView(APIView):
+    def post(self, request):
+        serializer = ReportPackSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(stream_report_pack(serializer.validated_data['symbols']), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="reports.zip"'
+        return response
+
+
+class MetricsView(APIView):
+    def get(self, request):
+        return HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProfileListView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        profiles = []
+        for profile in list_profiles(request.query_params.get('view')):
+            profiles.append({
+                **profile._asdict(),
+                'pstats_url': reverse('profile-download', kwargs={'profile_id': profile.id, 'extension': 'pstats'}),
+                'collapsed_url': reverse('profile-download', kwargs={'profile_id': profile.id, 'extension': 'collapsed'}),
+            })
+        return Response(profiles, status=status.HTTP_200_OK)
+
+
+class ProfileDownloadView(APIView):
+    permission_classes = [IsAdminUser]
+    content_types = {'pstats': 'application/octet-stream', 'collapsed': 'text/plain; charset=utf-8', 'json': 'application/json'}
+
+    def get(self, request, profile_id, extension):
+        try:
+            path = profile_path(profile_id, extension)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        if not os.path.exists(path):
+            return Response({'error': f'Profile {profile_id} not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return file_response(request, path, self.content_types[extension], f'{profile_id}.{extension}', as_attachment=True)
+
+
+class ModelStatusView(APIView):
+    # Reports where the model files live, so it is for admins only.
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(model_registry.info(), status=status.HTTP_200_OK)
+
+
 class GenerateReportView(APIView):
     def get(self, request, *args, **kwargs):
         symbol = request.query_params.get('symbol')
         if not symbol:
             return Response({'error': 'Stock symbol is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        historical_data = StockPrice.objects.filter(symbol=symbol).order_by('date')
-        predicted_data = Prediction.objects.filter(symbol=symbol).order_by('date')
+        output = request.query_params.get('output', 'pdf')
+        disposition = request.query_params.get('disposition', 'inline')
+        if output not in ('pdf', 'html') or disposition not in ('inline', 'attachment'):
+            return Response({'error': 'output must be pdf or html and disposition inline or attachment'}, status=status.HTTP_400_BAD_REQUEST)
+
+        window = ReportWindowSerializer(data=request.query_params)
+        if not window.is_valid():
+            return Response(window.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            data = load_report_data(symbol, **window.validated_data)
+        except Prediction.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        # The digest covers every input of the report, so a client holding it
+        # already has this exact report and nothing needs to be rendered.
+        digest = report_digest(symbol, data)
+        etag = quote_etag(digest if output == 'pdf' else f'{digest}-html')
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        report = build_report(symbol, data=data, digest=digest)
+        last_modified = int(report.last_modified.timestamp())
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            not_modified['Last-Modified'] = http_date(last_modified)
+            return not_modified
 
-        if not historical_data.exists():
-            logger.warning(f"No historical data found for {symbol}. Generating partial report with predictions only.")
-            historical_dates, historical_prices = [], []
+        if output == 'html':
+            response = render(request, 'generated_report.html', {
+                'symbol': symbol,
+                'pdf_url': reverse('report-artifact', kwargs={'symbol': symbol, 'digest': digest, 'extension': 'pdf'}),
+                'chart_url': reverse('report-artifact', kwargs={'symbol': symbol, 'digest': digest, 'extension': 'png'}),
+            })
+            response['ETag'] = etag
         else:
-            historical_dates = [record.date for record in historical_data]
-            historical_prices = [record.close_price for record in historical_data]
-
-        if not predicted_data.exists():
-            return Response({'error': f'No prediction data available for {symbol}'}, status=status.HTTP_404_NOT_FOUND)
-
-        predicted_dates = [record.date for record in predicted_data]
-        predicted_prices = [record.predicted_price for record in predicted_data]
-
-        plot.figure(figsize=(10, 5))
-        if historical_dates:
-            plot.plot(historical_dates, historical_prices, label='Historical Prices', color='blue')
-        plot.plot(predicted_dates, predicted_prices, label='Predicted Prices', color='red', linestyle='--')
-        plot.xlabel('Date')
-        plot.ylabel('Price')
-        plot.title(f'Performance Report for {symbol}')
-        plot.legend()
-        plot.grid()
-
-        img_buffer = io.BytesIO()
-        plot.savefig(img_buffer, format='png')
-        img_buffer.seek(0)
-
-        pdf_buffer = io.BytesIO()
-        pdf = canvas.Canvas(pdf_buffer, pagesize=letter)
-        pdf.setTitle(f'Performance Report for {symbol}')
-        pdf.drawString(100, 750, f'Performance Report for {symbol}')
-        pdf.drawString(100, 730, 'Key Metrics:')
-        pdf.drawString(120, 710, f'Total Days Analyzed: {len(historical_dates)}')
-        pdf.drawString(120, 690, f'Number of Predictions: {len(predicted_dates)}')
-        pdf.drawImage(img_buffer, 100, 400, width=400, height=200)
-        pdf.save()
-        pdf_buffer.seek(0)
-
-        return render(request, 'generated_report.html', {'symbol': symbol, 'pdf_url': f'/api/generate-report/?symbol={symbol}'})
+            response = file_response(request, report.pdf, 'application/pdf', f'{symbol}_report.pdf', as_attachment=disposition == 'attachment', etag=etag)
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ReportArtifactView(APIView):
+    # Artifacts are addressed by the digest of their inputs, so whatever is
+    # served under a URL never changes and clients may cache it for good.
+    content_types = {'pdf': 'application/pdf', 'png': 'image/png'}
+
+    def get(self, request, symbol, digest, extension):
+        if extension not in self.content_types:
+            return Response({'error': f'Unknown artifact type {extension}'}, status=status.HTTP_404_NOT_FOUND)
+        if not DIGEST_PATTERN.match(digest):
+            return Response({'error': 'Unknown report'}, status=status.HTTP_404_NOT_FOUND)
+
+        report = report_cache.get(symbol, digest)
+        if report is None:
+            if extension == 'pdf':
+                return redirect(f"{reverse('generate-report')}?{urlencode({'symbol': symbol})}")
+            return Response({'error': 'Report is no longer cached'}, status=status.HTTP_404_NOT_FOUND)
+
+        content = report.pdf if extension == 'pdf' else report.png
+        response = file_response(request, content, self.content_types[extension], f'{symbol}_report.{extension}', as_attachment=request.query_params.get('disposition') == 'attachment', etag=quote_etag(digest))
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
 
     class GeneratePredictionView(APIView):
         def get(self, request, *args, **kwargs):
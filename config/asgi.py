@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+from api.model_registry import warm_up_models  # noqa: E402
+from api.symbol_index import warm_up_symbol_index  # noqa: E402
+
+warm_up_models()
+warm_up_symbol_index()